@@ -1,15 +1,44 @@
+import time
+
+# Marks the start of every script run for the first-paint measurement
+RUN_STARTED_AT = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
-import time
 import base64
-from streamlit_lottie import st_lottie
-import requests
+import io
 import json
+from concurrent.futures import as_completed
+import chart_panels
+import crossfilter
+import dataset_store
+import downsample
+import dtype_optimizer
+import epi_metrics
+import forecasting
+import figure_cache
+import ingest
+import live_data
+import lottie_assets
+import memory_trace
+import olap
+import plotly_payload
+import raster
+import render_pool
+import rendering
+import router
+import sample_data
+import sqlite_source
+import surveillance
+import time_index
+from lazy_imports import IMPORT_TIMES, lazy, requires
+
+# Heavy libraries are imported by the first page that needs them
+mpl_figure = lazy("matplotlib.figure")
+px = lazy("plotly.express")
+go = lazy("plotly.graph_objects")
+sns = lazy("seaborn")
 
 # Set page config MUST be first Streamlit call
 st.set_page_config(
@@ -18,17 +47,15 @@ st.set_page_config(
     page_icon="🩺"
 )
 
-# -- Function to load Lottie animations --
-def load_lottieurl(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
+# -- Warm the animation cache in the background; pages resolve lazily --
+lottie_assets.prefetch()
 
-# -- Load animations --
-lottie_coding = load_lottieurl("https://assets2.lottiefiles.com/packages/lf20_fcfjwiyb.json")
-lottie_health = load_lottieurl("https://assets10.lottiefiles.com/packages/lf20_5njp3vgg.json")
-lottie_chart = load_lottieurl("https://assets9.lottiefiles.com/packages/lf20_xlkxtmul.json")
+# -- Function to show a Lottie animation only once a page asks for it --
+def show_animation(name, height, key):
+    animation = lottie_assets.get_animation(name)
+    if animation is not None:
+        from streamlit_lottie import st_lottie
+        st_lottie(animation, height=height, key=key)
 
 # -- Custom Styles for Colors, Fonts & Layout --
 st.markdown(
@@ -233,48 +260,148 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Create a sample dataset for demonstrations
-@st.cache_data
-def create_sample_data():
-    dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
-    np.random.seed(42)
-    
-    # Create seasonal pattern with peaks every few months
-    seasonal = 10 * np.sin(np.linspace(0, 4*np.pi, len(dates)))
-    
-    # Add trend
-    trend = np.linspace(20, 40, len(dates))
-    
-    # Add noise
-    noise = np.random.normal(0, 5, len(dates))
-    
-    # Combine components
-    cases = trend + seasonal + noise
-    cases = np.maximum(cases, 0)  # No negative cases
-    
-    # Add some anomaly days (outbreaks)
-    outbreak_days = [50, 150, 250]
-    for day in outbreak_days:
-        cases[day:day+14] += np.random.randint(10, 30)
-    
-    # Demographics data
-    age_groups = ['0-18', '19-35', '36-50', '51-65', '65+']
-    gender = ['Male', 'Female']
-    
-    # Create patient records
-    data = {
-        'date': dates,
-        'cases': cases.astype(int),
-        'recovered': (cases * 0.8).astype(int),
-        'tests': (cases * np.random.randint(5, 15, len(dates))).astype(int),
-        'age_group': np.random.choice(age_groups, len(dates)),
-        'gender': np.random.choice(gender, len(dates), p=[0.48, 0.52]),
-        'region': np.random.choice(['North', 'South', 'East', 'West', 'Central'], len(dates)),
-        'hospitalized': (cases * 0.12).astype(int)
+# Sample dataset as a memory-mapped Arrow table, shared by every session.
+# The first process to ask for a spec generates it and writes it to disk;
+# later processes and replicas only map the file.
+@st.cache_resource(show_spinner="Generando datos de ejemplo...")
+def sample_table(start='2023-01-01', end='2023-12-31', n_regions=5,
+                 granularity='daily', n_rows=None, seed=42):
+    spec = dict(start=start, end=end, n_regions=n_regions,
+                granularity=granularity, n_rows=n_rows, seed=seed)
+    key = sample_data.dataset_key(**spec)
+    return dataset_store.load_or_build(
+        key, lambda: compact_dataset(key, sample_data.generate_health_data(**spec), as_text=True,
+                                     sample_spec=json.dumps(spec))
+    )
+
+# Every dataset entering the app is stored with compact dtypes, together
+# with its key, the before/after memory report shown on the data loading
+# page and any other metadata given. The sample generator already emits
+# categoricals, so its "before" is measured as the text columns a raw file
+# would hold.
+def compact_dataset(key, df, as_text=False, **metadata):
+    df, report = dtype_optimizer.optimize(df, as_text=as_text)
+    return df, {"dataset_key": key, "memory_report": dtype_optimizer.dumps_report(report), **metadata}
+
+# Aggregation cube, daily totals and running statistics of a stored
+# dataset, built once per process and shared by every session
+@st.cache_resource(show_spinner="Calculando agregados...")
+def live_dataset(key):
+    table = dataset_store.open_table(key)
+    return live_data.LiveDataset.from_frames(
+        lambda columns: dataset_store.iter_frames(table, columns)
+    )
+
+# Bitmap indexes over the rows of a stored dataset plus the records
+# appended to its live version, for cross-filtering. Built once per data
+# version; an append changes the version, so the index is rebuilt with the
+# new rows (appended frames are not hashed, the version identifies them).
+@st.cache_resource(show_spinner="Indexando filas...", max_entries=8)
+def crossfilter_index(key, version=0, _appended=()):
+    table = dataset_store.open_table(key)
+    columns = ['date', *crossfilter.DIMENSIONS, *crossfilter.MEASURES]
+    frame = dataset_store.to_frame(table, columns)
+    if _appended:
+        frame = pd.concat([frame, *(records[columns] for records in _appended)], ignore_index=True)
+    return crossfilter.BitmapIndex(frame)
+
+# Cross-filter index of the data a page shows, appended days included
+def crossfilter_for(df):
+    live = live_for(df)
+    return crossfilter_index(df.attrs["dataset_key"], live.version, live.appended)
+
+# Live dataset and current cube for the sample DataFrame a page received:
+# this session's own fork once it has simulated new days, otherwise the
+# one shared by the process
+def live_for(df):
+    key = df.attrs["dataset_key"]
+    return st.session_state.get(f"live-{key}") or live_dataset(key)
+
+def cube_for(df):
+    return live_for(df).cube
+
+# Cache key of the data a chart shows: dataset key and the latest version
+# that changed anything up to the end of the chart's date range
+def data_version(df, date_range=None):
+    return f"{df.attrs['dataset_key']}@{live_for(df).version_for(date_range)}"
+
+# Simulate the arrival of the next day of records, generated from the
+# sample dataset's own spec so it continues its trend and granularity.
+# Only this session sees the new days: they go to a fork of the shared
+# live dataset kept in the session state, and are never written to the
+# store, so other sessions and replicas keep the stored data.
+def append_next_day(df):
+    key = df.attrs["dataset_key"]
+    live = st.session_state.get(f"live-{key}") or live_dataset(key).fork()
+    day = live.cube.dates[-1] + pd.Timedelta(days=1)
+    live.append(sample_data.next_day(day, **json.loads(df.attrs["sample_spec"])))
+    st.session_state[f"live-{key}"] = live
+    return live.version
+
+# SQLite copy of a stored dataset with a pool of read-only connections,
+# shared by every session of the process
+@st.cache_resource(show_spinner="Creando base de datos SQLite...")
+def sqlite_pool(key):
+    path = sqlite_source.ensure_database(
+        key, lambda: dataset_store.iter_frames(dataset_store.open_table(key))
+    )
+    return sqlite_source.ConnectionPool(path)
+
+# Filters of the SQL example over the sample dataset's dimensions
+def sql_filters(df):
+    cols = st.columns(4)
+    filters = {
+        'region': cols[0].multiselect("Región", list(df['region'].cat.categories), key="sql-region"),
+        'age_group': cols[1].multiselect("Grupo de edad", list(df['age_group'].cat.categories), key="sql-age"),
+        'gender': cols[2].multiselect("Género", list(df['gender'].cat.categories), key="sql-gender"),
     }
-    
-    df = pd.DataFrame(data)
-    return df
+    dates = cols[3].date_input("Fechas", value=(df['date'].min(), df['date'].max()), key="sql-dates")
+    if isinstance(dates, (tuple, list)) and len(dates) == 2:
+        filters['date'] = tuple(dates)
+    return filters
+
+# Uploaded datasets, memory-mapped once per process
+@st.cache_resource
+def stored_table(key):
+    return dataset_store.open_table(key)
+
+# Create a sample dataset for demonstrations with only the requested columns
+def create_sample_data(columns=None, **spec):
+    return dataset_store.to_frame(sample_table(**spec), columns)
+
+# Sidebar controls for the size and shape of the sample dataset
+def dataset_controls():
+    with st.expander("🧪 Datos de ejemplo"):
+        dates = st.date_input(
+            "Rango de fechas",
+            value=(pd.Timestamp('2023-01-01'), pd.Timestamp('2023-12-31'))
+        )
+        n_regions = st.slider("Regiones", 1, 50, 5)
+        granularity = st.radio(
+            "Granularidad", sample_data.GRANULARITIES,
+            format_func=lambda g: {"daily": "Agregado diario", "patient": "Por paciente"}[g]
+        )
+        n_rows = None
+        if granularity == 'patient':
+            n_rows = st.select_slider(
+                "Filas (pacientes)",
+                [n for n in (10_000, 100_000, 1_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000)
+                 if n <= sample_data.MAX_PATIENT_ROWS],
+                value=1_000_000,
+                format_func=lambda n: f"{n:,}"
+            )
+            if n_rows > sample_data.LARGE_PATIENT_ROWS:
+                st.warning(f"Generar {n_rows:,} filas necesita unos "
+                           f"{n_rows * sample_data.PATIENT_ROW_BYTES / 1e9:.1f} GB de memoria.")
+    # Until both ends of the range are picked, keep a one-day range
+    if isinstance(dates, (tuple, list)):
+        start, end = (dates[0], dates[-1]) if dates else (None, None)
+    else:
+        start = end = dates
+    start = start or pd.Timestamp('2023-01-01')
+    end = end or start
+    return dict(start=str(start), end=str(end), n_regions=n_regions,
+                granularity=granularity, n_rows=n_rows)
 
 # Function to show header on every page
 def show_header():
@@ -314,6 +441,128 @@ def warning_box(text):
 def success_box(text):
     st.markdown(f'<div class="success-box">✅ {text}</div>', unsafe_allow_html=True)
 
+# Show a matplotlib chart through the rendered-figure cache: draw() only
+# runs when the chart is not cached for the current data version and params.
+# draw() builds its own Figure (never pyplot) and is styled by `style`.
+def show_figure(chart_id, df, draw, style='default', **params):
+    st.image(figure_cache.render(chart_id, data_version(df), draw, params, style=style))
+
+# Date range of the last box drawn on a Plotly chart with box selection,
+# from the chart's widget state; None when nothing is selected
+def selected_range(state):
+    boxes = (state or {}).get('selection', {}).get('box', [])
+    if not boxes:
+        return None
+    x = pd.to_datetime(boxes[-1]['x'])
+    return (x.min(), x.max())
+
+# Date-range slider and resample level for a time_index.TimeSeries;
+# returns ((start, end), level)
+def time_range_controls(timeline, key):
+    first, last = (day.date() for day in timeline.bounds)
+    cols = st.columns([3, 1])
+    date_range = cols[0].slider("Rango de fechas", min_value=first, max_value=last,
+                                value=(first, last), format="YYYY-MM-DD", key=f"{key}-range")
+    level = cols[1].radio("Resolución", list(time_index.LEVELS), format_func=time_index.LEVEL_NAMES.get,
+                          horizontal=True, key=f"{key}-level")
+    return date_range, level
+
+# Queue a chart_panels chart on the render pool and reserve its place on
+# the page; fill_figures() puts the images in once the page text is out
+def submit_figure(placeholder, chart_id, df, draw, data, style='default', **params):
+    placeholder.caption("⏳ Generando gráfico...")
+    future = render_pool.submit(chart_id, data_version(df), draw, data, params, style=style)
+    return future, placeholder
+
+# Fill placeholders in the order their charts finish
+def fill_figures(pending):
+    placeholders = dict(pending)
+    for future in as_completed(placeholders):
+        placeholders[future].image(future.result())
+
+# Function to display the before/after memory report of a dataset
+def show_memory_report(report):
+    total = report.loc['total']
+    before_kb = total['bytes_before'] / 1024
+    after_kb = total['bytes_after'] / 1024
+    saved = 1 - after_kb / before_kb if before_kb else 0
+    st.metric(
+        "Memoria (memory_usage(deep=True))",
+        f"{after_kb:,.1f} KB",
+        f"-{saved:.0%} frente a {before_kb:,.1f} KB",
+        delta_color="inverse"
+    )
+    table = report.drop(index='total').rename(columns={
+        'dtype_before': 'Tipo original', 'bytes_before': 'Bytes antes',
+        'dtype_after': 'Tipo optimizado', 'bytes_after': 'Bytes después'
+    })
+    st.dataframe(table)
+
+# Upload or local file form: streams the file into the columnar store and
+# previews it without converting the whole table
+def show_ingest_form():
+    uploaded = st.file_uploader(
+        "Sube un archivo CSV, Excel o Parquet",
+        type=[ext.lstrip('.') for ext in ingest.EXTENSIONS]
+    )
+    local_path = st.text_input("...o escribe la ruta de un archivo local")
+    
+    if st.button("Cargar datos"):
+        source = uploaded if uploaded is not None else local_path.strip()
+        if not source:
+            st.warning("Elige un archivo o escribe una ruta.")
+            return
+        bar = st.progress(0.0, text="Leyendo archivo...")
+        try:
+            key = ingest.ingest(
+                source,
+                progress=lambda done: bar.progress(done, text=f"Leyendo archivo... {done:.0%}")
+            )
+        except (OSError, ValueError) as error:
+            st.error(f"No se pudo cargar el archivo: {error}")
+            return
+        st.session_state["uploaded_dataset"] = key
+    
+    key = st.session_state.get("uploaded_dataset")
+    if key and dataset_store.exists(key):
+        table = stored_table(key)
+        st.success(f"{table.num_rows:,} filas · {table.num_columns} columnas")
+        report = dataset_store.metadata(table).get("memory_report")
+        if report:
+            show_memory_report(dtype_optimizer.loads_report(report))
+        st.dataframe(dataset_store.to_frame(table.slice(0, 100)))
+        st.dataframe(pd.DataFrame({
+            'Columna': table.schema.names,
+            'Tipo': [str(field_type) for field_type in table.schema.types]
+        }))
+
+# Live SQLite example: its filters and the aggregation run inside SQLite
+# and only the grouped result is read into pandas. An example only; the
+# other pages do not read from SQLite.
+def show_sql_example(df):
+    st.subheader("Ejemplo: consultas SQL sin cargar toda la tabla")
+    st.caption("Estos filtros y la agrupación se ejecutan en SQLite solo en este ejemplo; "
+               "las demás páginas no leen de SQLite.")
+    pool = sqlite_pool(df.attrs["dataset_key"])
+    filters = sql_filters(df)
+    
+    by = st.multiselect("Agrupar por", ['month', 'region', 'age_group', 'gender'], default=['region'])
+    result = sqlite_source.aggregate(pool, by=by, filters=filters)
+    st.caption(f"{sqlite_source.count(pool, filters):,} filas coinciden con los filtros; "
+               f"{len(result):,} filas llegan a pandas")
+    st.dataframe(result)
+    st.code("""
+import sqlite3
+conn = sqlite3.connect('hospital.db')
+consulta = \"\"\"
+    SELECT region, SUM(cases) AS cases, SUM(hospitalized) AS hospitalized
+    FROM pacientes
+    WHERE gender IN (?) AND date BETWEEN ? AND ?
+    GROUP BY region
+\"\"\"
+df_sql = pd.read_sql(consulta, conn, params=['Male', '2023-01-01', '2023-01-31'])
+    """)
+
 # Function to display timeline item
 def timeline_item(title, content):
     st.markdown(f"""
@@ -328,9 +577,6 @@ def main():
     # Display the custom header
     show_header()
     
-    # Create sample data
-    df = create_sample_data()
-
     # Sidebar with improved styling
     with st.sidebar:
         st.image("https://img.icons8.com/color/96/000000/python.png", width=80)
@@ -350,39 +596,10 @@ def main():
         </style>
         """, unsafe_allow_html=True)
         
-        page = st.radio(
-            "Navegación", [
-                "🏠 Introducción",
-                "🐍 ¿Qué es Python?",
-                "📊 ¿Por qué Python?",
-                "⚙️ Configuración del Entorno",
-                "👨‍💻 Tu Primer Script",
-                "📋 Cargar y Visualizar Datos",
-                "🔤 Entender Tipos de Datos",
-                "🎨 Personalizar y Guardar Gráficos",
-                "📱 Gráficos Interactivos",
-                "🧮 Análisis Estadístico",
-                "🔄 Flujos de Trabajo",
-                "📚 Descargar eBook"
-            ]
-        )
+        page = router.navigation(PAGES)
         
         # Dynamic progress based on page selection
-        page_index = [
-            "🏠 Introducción",
-            "🐍 ¿Qué es Python?",
-            "📊 ¿Por qué Python?",
-            "⚙️ Configuración del Entorno",
-            "👨‍💻 Tu Primer Script",
-            "📋 Cargar y Visualizar Datos",
-            "🔤 Entender Tipos de Datos",
-            "🎨 Personalizar y Guardar Gráficos",
-            "📱 Gráficos Interactivos",
-            "🧮 Análisis Estadístico",
-            "🔄 Flujos de Trabajo",
-            "📚 Descargar eBook"
-        ].index(page)
-        progress_value = (page_index + 1) / 12
+        progress_value = router.progress_of(PAGES, page)
         progress.progress(progress_value)
         
         # Track and show progress
@@ -399,34 +616,30 @@ def main():
             ]
             st.info(np.random.choice(tips))
         
+        # Size of the generated dataset
+        spec = dataset_controls()
+        
         st.markdown("---")
         st.markdown("📧 contacto@auragutierrez.md")
 
-    # Main content area based on page selection
-    if page == "🏠 Introducción":
-        show_introduction()
-    elif page == "🐍 ¿Qué es Python?":
-        show_what_is_python()
-    elif page == "📊 ¿Por qué Python?":
-        show_why_python()
-    elif page == "⚙️ Configuración del Entorno":
-        show_setup()
-    elif page == "👨‍💻 Tu Primer Script":
-        show_hello_world()
-    elif page == "📋 Cargar y Visualizar Datos":
-        show_load_preview(df)
-    elif page == "🔤 Entender Tipos de Datos":
-        show_data_types(df)
-    elif page == "🎨 Personalizar y Guardar Gráficos":
-        show_customize_plots(df)
-    elif page == "📱 Gráficos Interactivos":
-        show_interactive(df)
-    elif page == "🧮 Análisis Estadístico":
-        show_statistics(df)
-    elif page == "🔄 Flujos de Trabajo":
-        show_workflows()
-    elif page == "📚 Descargar eBook":
-        show_download()
+    # Main content area: only the selected page runs
+    with memory_trace.page_run(page.slug):
+        router.render(page, lambda columns: create_sample_data(columns, **spec))
+
+    # First-paint timing and deferred import costs, shown with ?perf=1
+    if st.query_params.get("perf") == "1":
+        elapsed_ms = (time.perf_counter() - RUN_STARTED_AT) * 1000
+        st.sidebar.caption(f"Render: {elapsed_ms:.0f} ms")
+        for module_name, seconds in IMPORT_TIMES.items():
+            st.sidebar.caption(f"import {module_name}: {seconds * 1000:.0f} ms")
+        figures = figure_cache.cache
+        st.sidebar.caption(
+            f"Figuras en caché: {len(figures)} ({figures.size / 1024:.0f} KB), "
+            f"aciertos {figures.hits}/{figures.hits + figures.misses}"
+        )
+        if memory_trace.ENABLED:
+            for slug, growth in memory_trace.report().items():
+                st.sidebar.caption(f"Memoria {slug}: {growth / 1024:+.0f} KB por ejecución")
 
 # Section: Introduction with animation
 def show_introduction():
@@ -447,7 +660,7 @@ def show_introduction():
         """)
     
     with col2:
-        st_lottie(lottie_health, height=200, key="intro_animation")
+        show_animation("health", height=200, key="intro_animation")
     
     st.markdown("---")
     
@@ -551,7 +764,7 @@ def show_what_is_python():
         timeline_item("Hoy", "Uno de los lenguajes más populares para análisis de datos en salud")
         
     with col2:
-        st_lottie(lottie_coding, height=300, key="python_animation")
+        show_animation("coding", height=300, key="python_animation")
     
     st.markdown("---")
     
@@ -618,6 +831,7 @@ Analizando datos de Carlos
     y entenderás cómo funciona cada parte.
     """)
 
+@requires(go)
 def show_why_python():
     st.title("¿Por qué Python para Datos de Salud?")
 
@@ -683,7 +897,7 @@ def show_why_python():
 - **Visualización avanzada**  
   Gráficos dinámicos y personalizables.
         """)
-        st_lottie(lottie_chart, height=300, key="benefits_animation")
+        show_animation("chart", height=300, key="benefits_animation")
 
     st.markdown("---")
 
@@ -1000,11 +1214,7 @@ print(f"Colesterol promedio: {promedio_colesterol:.2f} mg/dL")
     
     st.write("Las funciones permiten reutilizar código y organizar mejor tus scripts:")
     
-# Paso 3: Crear Funciones
-st.header("Paso 3: Crear Funciones")
-st.write("Las funciones permiten reutilizar código y organizar mejor tus scripts:")
-
-st.code('''
+    st.code('''
 # Definir una función para calcular IMC
 def calcular_imc(peso, altura):
     """
@@ -1062,16 +1272,17 @@ for paciente in pacientes_datos:
     categoria = interpretar_imc(imc)
     
     print(f"{nombre}: IMC = {imc:.2f}, Categoría: {categoria}")
-''', language="python")
-
-st.subheader("Resultado:")
-st.code('''
+    ''', language="python")
+    
+    st.subheader("Resultado:")
+    st.code('''
 Juan Pérez: IMC = 27.92, Categoría: Sobrepeso
 María López: IMC = 22.77, Categoría: Peso normal
 Carlos Gómez: IMC = 27.40, Categoría: Sobrepeso
-''', language="text")
+    ''', language="text")
 
 # Section: Load and preview data
+@requires(mpl_figure)
 def show_load_preview(df):
     st.title("Cargar y Visualizar Datos")
     
@@ -1105,6 +1316,12 @@ print(df.head())
     
     st.code(loading_code)
     
+    with st.expander("📂 Prueba con tus propios datos"):
+        show_ingest_form()
+    
+    if "dataset_key" in df.attrs:
+        show_sql_example(df)
+    
     # Step 2: Exploring data
     st.header("Paso 2: Explorar los Datos")
     
@@ -1142,24 +1359,14 @@ print(df['gender'].value_counts())
     with col2:
         st.subheader("Ejemplo con datos reales")
         st.dataframe(df.head())
-        st.code("""
-# Información del DataFrame
-<class 'pandas.core.frame.DataFrame'>
-RangeIndex: 365 entries, 0 to 364
-Data columns (total 8 columns):
- #   Column       Non-Null Count  Dtype         
----  ------       --------------  -----         
- 0   date         365 non-null    datetime64[ns]
- 1   cases        365 non-null    int64         
- 2   recovered    365 non-null    int64         
- 3   tests        365 non-null    int64         
- 4   age_group    365 non-null    object        
- 5   gender       365 non-null    object        
- 6   region       365 non-null    object        
- 7   hospitalized 365 non-null    int64         
-dtypes: datetime64[ns](1), int64(4), object(3)
-memory usage: 22.9+ KB
-        """)
+        
+        # Live df.info() of the data actually loaded
+        info_buffer = io.StringIO()
+        df.info(buf=info_buffer, memory_usage='deep')
+        st.code("# Información del DataFrame\n" + info_buffer.getvalue())
+        
+        if "memory_report" in df.attrs:
+            show_memory_report(dtype_optimizer.loads_report(df.attrs["memory_report"]))
     
     # Step 3: Basic visualization
     st.header("Paso 3: Visualización Básica")
@@ -1197,12 +1404,16 @@ plt.suptitle('')  # Eliminar título automático
     
     st.code(viz_code)
     
-    # Example plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-    df.plot(x='date', y='cases', ax=ax, title='Casos Diarios')
-    ax.set_ylabel('Número de casos')
-    ax.grid(True, alpha=0.3)
-    st.pyplot(fig)
+    # Example plot (national totals per day)
+    daily = cube_for(df).query(by=['date'])
+    def draw():
+        fig = mpl_figure.Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        daily.plot(x='date', y='cases', ax=ax, title='Casos Diarios')
+        ax.set_ylabel('Número de casos')
+        ax.grid(True, alpha=0.3)
+        return fig
+    show_figure("load-daily-cases", df, draw)
     
     # Step 4: Basic data manipulation
     st.header("Paso 4: Manipulación Básica de Datos")
@@ -1246,6 +1457,19 @@ datos_completos['casos_por_millon'] = datos_completos['cases'] / datos_completos
     with st.expander("Ver código de manipulación de datos"):
         st.code(manipulation_code)
     
+    # The same filters answered from bitmap indexes: one AND per condition
+    # instead of comparing every row
+    index = crossfilter_for(df)
+    examples = {
+        "df['region'] == 'North'": {'region': ['North']},
+        "(df['gender'] == 'Male') & (df['age_group'] == '65+')": {'gender': ['Male'], 'age_group': ['65+']},
+    }
+    st.write("Filas que cumplen cada filtro (índices de bits):")
+    st.dataframe(pd.DataFrame({
+        'Filtro': list(examples),
+        'Filas': [index.select(filters).count() for filters in examples.values()]
+    }), hide_index=True)
+    
     # Tips
     info_box("""
     Consejo profesional: pandas tiene más de 200 funciones para manipular datos.
@@ -1298,18 +1522,22 @@ plt.tight_layout()
         st.code(solution_code)
         
         # Sample visualization for solution 3
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(df['date'], df['cases'], label='Nuevos casos')
-        ax.plot(df['date'], df['recovered'], label='Recuperados')
-        ax.set_title('Evolución de Casos vs Recuperados')
-        ax.set_xlabel('Fecha')
-        ax.set_ylabel('Número')
-        ax.grid(True, alpha=0.3)
-        ax.legend()
-        plt.tight_layout()
-        st.pyplot(fig)
+        def draw():
+            fig = mpl_figure.Figure(figsize=(12, 6))
+            ax = fig.subplots()
+            ax.plot(daily['date'], daily['cases'], label='Nuevos casos')
+            ax.plot(daily['date'], daily['recovered'], label='Recuperados')
+            ax.set_title('Evolución de Casos vs Recuperados')
+            ax.set_xlabel('Fecha')
+            ax.set_ylabel('Número')
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+            fig.tight_layout()
+            return fig
+        show_figure("load-cases-vs-recovered", df, draw)
 
 # Function to continue with additional sections
+@requires(mpl_figure)
 def show_data_types(df):
     st.title("Entender Tipos de Datos")
     
@@ -1419,17 +1647,23 @@ df['age_group'] = pd.cut(
 )
         """)
         
-# Example with real data from our sample
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.hist(df['cases'], bins=20, edgecolor='black')
-        ax.set_title('Distribución de Casos')
-        ax.set_xlabel('Número de casos')
-        ax.set_ylabel('Frecuencia')
-        st.pyplot(fig)
+# Example with real data from our sample (cases per region and day)
+        cube = cube_for(df)
+        region_days = cube.query(by=['date', 'region'])
+        edges, counts = live_for(df).histogram('cases').rebin(20)
+        def draw():
+            fig = mpl_figure.Figure(figsize=(10, 6))
+            ax = fig.subplots()
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', edgecolor='black')
+            ax.set_title('Distribución de Casos')
+            ax.set_xlabel('Número de casos')
+            ax.set_ylabel('Frecuencia')
+            return fig
+        show_figure("types-cases-histogram", df, draw)
         
         # Show some stats
         st.write("Estadísticas de casos:")
-        st.write(df['cases'].describe())
+        st.write(region_days['cases'].describe())
     
     with datatypes_tabs[1]:
         st.subheader("Datos Categóricos")
@@ -1454,16 +1688,23 @@ df = pd.concat([df, dummies], axis=1)
         
         # Example with real data
         st.write("Conteo por región:")
-        st.write(df['region'].value_counts())
+        region_counts = cube.query(by=['region'], measures=[olap.ROWS]).set_index('region')[olap.ROWS]
+        region_counts = region_counts.astype(int).sort_values(ascending=False)
+        st.write(region_counts)
+        
+        st.write("Tabla de contingencia género × grupo de edad:")
+        st.dataframe(cube.crosstab('gender', 'age_group').astype(int))
         
-        fig, ax = plt.subplots(figsize=(10, 6))
-        region_counts = df['region'].value_counts()
-        ax.bar(region_counts.index, region_counts.values)
-        ax.set_title('Conteo por Región')
-        ax.set_xlabel('Región')
-        ax.set_ylabel('Conteo')
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+        def draw():
+            fig = mpl_figure.Figure(figsize=(10, 6))
+            ax = fig.subplots()
+            ax.bar(region_counts.index, region_counts.values)
+            ax.set_title('Conteo por Región')
+            ax.set_xlabel('Región')
+            ax.set_ylabel('Conteo')
+            ax.tick_params(axis='x', labelrotation=45)
+            return fig
+        show_figure("types-region-counts", df, draw)
     
     with datatypes_tabs[2]:
         st.subheader("Datos de Fechas")
@@ -1490,17 +1731,25 @@ mensual = df.set_index('date').resample('M').sum()
         """)
         
         # Example with real data
-        df_dates = df.copy()
-        df_dates['month'] = df_dates['date'].dt.month
-        monthly_data = df_dates.groupby('month')['cases'].sum()
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(monthly_data.index, monthly_data.values, marker='o')
-        ax.set_title('Casos por Mes')
-        ax.set_xlabel('Mes')
-        ax.set_ylabel('Total de Casos')
-        ax.grid(True, alpha=0.3)
-        st.pyplot(fig)
+        monthly_data = cube.query(by=['month'], measures=['cases']).set_index('month')['cases']
+        
+        def draw():
+            fig = mpl_figure.Figure(figsize=(10, 6))
+            ax = fig.subplots()
+            ax.plot(monthly_data.index, monthly_data.values, marker='o')
+            ax.set_title('Casos por Mes')
+            ax.set_xlabel('Mes')
+            ax.set_ylabel('Total de Casos')
+            ax.grid(True, alpha=0.3)
+            return fig
+        show_figure("types-monthly-cases", df, draw)
+        
+        # Range filter without boolean masks: the series is sorted by date,
+        # so a range is two binary searches and a view of the stored rows
+        st.write("Elige un rango y una resolución (día, semana o mes):")
+        timeline = live_for(df).time_series()
+        date_range, level = time_range_controls(timeline, "types")
+        st.line_chart(timeline.slice(*date_range, level=level)[['cases', 'recovered']])
     
     with datatypes_tabs[3]:
         st.subheader("Datos de Texto")
@@ -1593,6 +1842,7 @@ df['temperature'] = df['temperature'].interpolate(method='linear')
     """)
 
 # Section: Customize and save plots
+@requires(mpl_figure, sns)
 def show_customize_plots(df):
     st.title("Personalizar y Guardar Gráficos")
     
@@ -1658,36 +1908,45 @@ plt.savefig('evolucion_covid.svg')  # Vectorial para edición
     st.code(basic_custom_code)
     
     # Example plot with customization
-    fig, ax = plt.subplots(figsize=(10, 6))
-    plt.style.use('seaborn-v0_8-whitegrid')
-    
-    ax.plot(df['date'], df['cases'], color='#E76F51', linewidth=2, marker='o', 
-            markersize=4, alpha=0.7, label='Casos')
-    ax.plot(df['date'], df['recovered'], color='#2A9D8F', linewidth=2, marker='s', 
-            markersize=4, alpha=0.7, label='Recuperados')
-    
-    ax.set_title('Evolución de Casos COVID-19', fontsize=16, pad=20)
-    ax.set_xlabel('Fecha', fontsize=12)
-    ax.set_ylabel('Número de Casos', fontsize=12)
-    
-    ax.tick_params(axis='both', which='major', labelsize=10)
-    ax.set_ylim(bottom=0)
-    
-    ax.grid(True, linestyle='--', alpha=0.7)
-    ax.legend(loc='upper left', frameon=True, fontsize=10)
-    
-    max_idx = df['cases'].idxmax()
-    max_date = df.loc[max_idx, 'date']
-    max_cases = df['cases'].max()
-    
-    ax.annotate(f'Pico: {max_cases}',
-                xy=(max_date, max_cases),
-                xytext=(10, -30),
-                textcoords='offset points',
-                arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=.2'))
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+    cube = cube_for(df)
+    daily = cube.query(by=['date'])
+    region_days = cube.query(by=['date', 'region'])
+    def draw():
+        fig = mpl_figure.Figure(figsize=(10, 6))
+        ax = fig.subplots()
+    
+        # At most one point per pixel of the figure's width
+        width_px = fig.get_figwidth() * figure_cache.DPI
+        ax.plot(*downsample.series(daily['date'], daily['cases'], width_px),
+                color='#E76F51', linewidth=2, marker='o', 
+                markersize=4, alpha=0.7, label='Casos')
+        ax.plot(*downsample.series(daily['date'], daily['recovered'], width_px),
+                color='#2A9D8F', linewidth=2, marker='s', 
+                markersize=4, alpha=0.7, label='Recuperados')
+    
+        ax.set_title('Evolución de Casos COVID-19', fontsize=16, pad=20)
+        ax.set_xlabel('Fecha', fontsize=12)
+        ax.set_ylabel('Número de Casos', fontsize=12)
+    
+        ax.tick_params(axis='both', which='major', labelsize=10)
+        ax.set_ylim(bottom=0)
+    
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.legend(loc='upper left', frameon=True, fontsize=10)
+    
+        max_idx = daily['cases'].idxmax()
+        max_date = daily.loc[max_idx, 'date']
+        max_cases = daily['cases'].max()
+    
+        ax.annotate(f'Pico: {max_cases}',
+                    xy=(max_date, max_cases),
+                    xytext=(10, -30),
+                    textcoords='offset points',
+                    arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=.2'))
+    
+        fig.tight_layout()
+        return fig
+    show_figure("custom-cases-line", df, draw, style='seaborn-v0_8-whitegrid')
     
     # Advanced visualization with Seaborn
     st.header("Visualización Avanzada con Seaborn")
@@ -1730,15 +1989,25 @@ g.tight_layout()
     
     st.code(seaborn_code)
     
-    # Example seaborn plot
-    sns.set_theme(style="whitegrid", palette="deep", font_scale=1.1)
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x='region', y='cases', data=df, ax=ax)
-    ax.set_title('Casos por Región con Intervalos de Confianza 95%')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Example seaborn-style plot (the theme only applies to this figure).
+    # Means and t intervals come precomputed per data version instead of
+    # seaborn bootstrapping every region on each render.
+    intervals = live_for(df).mean_ci('cases', 'region')
+    def draw():
+        fig = mpl_figure.Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        means = intervals['mean']
+        errors = [means - intervals['ci_low'], intervals['ci_high'] - means]
+        ax.bar(intervals.index.astype(str), means, yerr=errors, capsize=4,
+               color=[f"C{i % 10}" for i in range(len(intervals))], error_kw=dict(ecolor='0.26', lw=1.5))
+        ax.set_xlabel('region')
+        ax.set_ylabel('cases')
+        ax.set_title('Casos por Región con Intervalos de Confianza 95%')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        return fig
+    show_figure("custom-region-barplot", df, draw,
+                style=rendering.seaborn_style('whitegrid', palette='deep', font_scale=1.1))
     
     # Multiple plots layout
     st.header("Layouts con Múltiples Gráficos")
@@ -1778,34 +2047,31 @@ plt.savefig('covid_dashboard.png', dpi=300, bbox_inches='tight')
     
     st.code(multipanel_code)
     
-    # Example multipanel plot
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-    
-    # Plot 1: Time series
-    axes[0, 0].plot(df['date'], df['cases'], color='crimson')
-    axes[0, 0].set_title('Evolución de Casos')
-    axes[0, 0].tick_params(axis='x', rotation=45)
-    
-    # Plot 2: Distribution
-    axes[0, 1].hist(df['cases'], bins=20, color='navy', alpha=0.7)
-    axes[0, 1].set_title('Distribución de Casos')
-    
-    # Plot 3: Bar by region
-    region_data = df.groupby('region')['cases'].sum().sort_values()
-    axes[1, 0].barh(region_data.index, region_data.values, color='forestgreen')
-    axes[1, 0].set_title('Casos por Región')
-    
-    # Plot 4: Scatter plot
-    axes[1, 1].scatter(df['cases'], df['hospitalized'], alpha=0.5, color='darkorange')
-    axes[1, 1].set_title('Hospitalizaciones vs Casos')
-    axes[1, 1].set_xlabel('Casos')
-    axes[1, 1].set_ylabel('Hospitalizaciones')
-    
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.9)
-    fig.suptitle('Dashboard COVID-19', fontsize=16)
-    
-    st.pyplot(fig)
+    # Example multipanel plot: the four panels render in parallel on the
+    # render pool and appear as they finish, after the rest of the page
+    st.subheader("Dashboard COVID-19")
+    region_data = cube.query(by=['region'], measures=['cases']).set_index('region')['cases'].sort_values()
+    edges, counts = live_for(df).histogram('cases').rebin(20)
+    panels = [
+        ("custom-dashboard-cases", chart_panels.line,
+         dict(x=daily['date'].values, y=daily['cases'].values),
+         dict(title='Evolución de Casos', color='crimson', rotation=45)),
+        ("custom-dashboard-histogram", chart_panels.histogram,
+         dict(edges=edges, counts=counts),
+         dict(title='Distribución de Casos', color='navy', alpha=0.7)),
+        ("custom-dashboard-regions", chart_panels.barh,
+         dict(labels=region_data.index.astype(str).tolist(), values=region_data.values),
+         dict(title='Casos por Región', color='forestgreen')),
+        ("custom-dashboard-scatter", chart_panels.scatter,
+         dict(x=region_days['cases'].values, y=region_days['hospitalized'].values),
+         dict(title='Hospitalizaciones vs Casos', xlabel='Casos', ylabel='Hospitalizaciones',
+              color='darkorange')),
+    ]
+    pending = []
+    for i, (chart_id, draw, data, params) in enumerate(panels):
+        if i % 2 == 0:
+            panel_cols = st.columns(2)
+        pending.append(submit_figure(panel_cols[i % 2].empty(), chart_id, df, draw, data, **params))
     
     # Tips for publication quality figures
     st.header("Tips para Figuras de Calidad de Publicación")
@@ -1868,23 +2134,20 @@ plt.tight_layout()
     with st.expander("Ver código para probar diferentes estilos"):
         st.code(gallery_code)
     
-    # Example gallery (simplified)
-    styles = ['default', 'seaborn-v0_8', 'ggplot']
-    fig, axes = plt.subplots(len(styles), 1, figsize=(10, 3*len(styles)))
-    
-    for i, style in enumerate(styles):
-        with plt.style.context(style):
-            axes[i].plot(df['date'][:50], df['cases'][:50])
-            axes[i].set_title(f"Estilo: {style}")
-            
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Example gallery (simplified): one figure per style, rendered in parallel
+    gallery = dict(x=daily['date'].values[:50], y=daily['cases'].values[:50])
+    for style in ('default', 'seaborn-v0_8', 'ggplot'):
+        pending.append(submit_figure(st.empty(), "custom-style-gallery", df, chart_panels.line, gallery,
+                                     style=style, title=f"Estilo: {style}", figsize=(10, 3)))
     
     info_box("""
     Para ver todos los estilos disponibles en tu instalación de matplotlib, ejecuta `plt.style.available`.
     """)
+    
+    fill_figures(pending)
 
 # Section: Interactive visualizations
+@requires(px, go)
 def show_interactive(df):
     st.title("Gráficos Interactivos")
     
@@ -1927,25 +2190,168 @@ fig.show()
     
     st.code(plotly_express_code)
     
-    # Interactive Plotly Express example
-    fig = px.line(
-        df, 
-        x='date', 
-        y=['cases', 'recovered', 'hospitalized'],
-        title='Evolución Temporal COVID-19',
-        labels={'value': 'Número', 'variable': 'Categoría'},
-        line_shape='spline'
-    )
+    # Interactive Plotly Express example. Long series are thinned to the
+    # chart width (LTTB) with a min/max band for the cases; the slider and
+    # a box selected on the chart pick the range, sliced from the sorted
+    # daily/weekly/monthly series with binary search.
+    live = live_for(df)
+    cube = live.cube
+    region_days = cube.query(by=['date', 'region'])
+    timeline = live.time_series()
+    date_range, level = time_range_controls(timeline, "series")
+    zoom_key = f"series-zoom-{st.session_state.get('series_zoom_resets', 0)}"
+    zoom = selected_range(st.session_state.get(zoom_key))
+    series = timeline.slice(*(zoom or date_range), level=level).reset_index()
+    if level == 'D':
+        series['cases_7d'] = live.rolling_mean(7).reindex(series['date']).values
+    
+    n_out = downsample.target_points(downsample.PLOTLY_WIDTH_PX)
+    thinned = len(series) > n_out
+    fig = go.Figure()
+    if thinned:
+        x_band, low, high = downsample.envelope(series['date'].values, series['cases'].values, n_out // 2)
+        fig.add_trace(go.Scatter(x=x_band, y=high, mode='lines', line=dict(width=0),
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=x_band, y=low, mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor='rgba(99, 110, 250, 0.2)', name='cases (mín-máx)',
+                                 hoverinfo='skip'))
+    for column in [name for name in ['cases', 'cases_7d', 'recovered', 'hospitalized'] if name in series]:
+        x, y = downsample.series(series['date'].values, series[column].values, downsample.PLOTLY_WIDTH_PX)
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=column,
+                                 line_shape='linear' if thinned else 'spline'))
     
     fig.update_layout(
+        title='Evolución Temporal COVID-19',
         hovermode='x unified',
         legend_title='Indicadores',
         xaxis_title='Fecha',
         yaxis_title='Número de Casos',
-        plot_bgcolor='rgba(240, 240, 240, 0.8)'
+        plot_bgcolor='rgba(240, 240, 240, 0.8)',
+        dragmode='select',
+        selectdirection='h'
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True,
+                    on_select="rerun", selection_mode="box", key=zoom_key)
+    if zoom:
+        st.caption(f"Mostrando del {zoom[0]:%Y-%m-%d} al {zoom[1]:%Y-%m-%d} con resolución completa.")
+        if st.button("🔍 Ver toda la serie"):
+            st.session_state['series_zoom_resets'] = st.session_state.get('series_zoom_resets', 0) + 1
+            st.rerun()
+    else:
+        st.caption("Selecciona un intervalo en el gráfico para ampliarlo.")
+    
+    # Epidemiological indicators for the same date range, every region at once
+    st.subheader("Indicadores Epidemiológicos")
+    metrics = live.metrics(sample_data.region_population(len(cube.labels['region'])))
+    metric_cols = st.columns([2, 3])
+    metric = metric_cols[0].selectbox("Indicador", metrics.names, format_func=epi_metrics.LABELS.get,
+                                      key="metric-name")
+    if 'incidence_7d' not in metrics.names:
+        st.caption("La incidencia no se muestra: no hay población para ninguna de estas regiones.")
+    elif metrics.missing_population:
+        st.caption("Sin población (incidencia vacía): " + ", ".join(metrics.missing_population))
+    regions = metric_cols[1].multiselect("Regiones", list(metrics.columns), default=[epi_metrics.TOTAL],
+                                         key="metric-regions")
+    start, end = zoom or date_range
+    values = metrics.frame(metric).loc[pd.Timestamp(start):pd.Timestamp(end), regions]
+    fig = go.Figure([go.Scatter(x=values.index, y=values[region], mode='lines', name=region)
+                     for region in values.columns])
+    fig.update_layout(title=epi_metrics.LABELS[metric], template='plotly_white', hovermode='x unified',
+                      yaxis_tickformat='.1%' if metric in ('growth_wow', 'positivity_7d') else None)
+    st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+
+    # Outbreak alerts marked on the national daily cases: a day is marked
+    # when the national total alerts or enough region x age group series
+    # alert together. Single small series alert now and then by chance
+    st.subheader("Detección de Brotes")
+    series_labels, alerts, national_alerts = live.alerts()
+    alert_cols = st.columns(2)
+    method = alert_cols[0].selectbox("Método de detección", list(surveillance.METHODS),
+                                     format_func=surveillance.LABELS.get, key="alert-method")
+    min_series = alert_cols[1].slider("Series en alerta para marcar un día", 1, len(series_labels),
+                                      max(2, -(-len(series_labels) // 4)), key="alert-min-series")
+    national = timeline.slice(start, end, level='D')['cases']
+    flags = pd.DataFrame(alerts[method], index=cube.dates, columns=series_labels).reindex(national.index,
+                                                                                         fill_value=False)
+    national_flags = pd.Series(national_alerts[method], index=cube.dates).reindex(national.index,
+                                                                                  fill_value=False)
+    n_alerts = flags.sum(axis=1)
+    marked = national_flags | (n_alerts >= min_series)
+    alert_days = flags.index[marked]
+    names = [", ".join(f"{region} · {age}" for region, age in flags.columns[row]) or "-"
+             for row in flags.loc[alert_days].to_numpy()]
+    totals = np.where(national_flags[alert_days], "sí", "no")
+    fig = go.Figure(go.Scatter(x=national.index, y=national.values, mode='lines', name='Casos nacionales'))
+    fig.add_trace(go.Scatter(
+        x=alert_days, y=national.loc[alert_days].values, mode='markers', name='Alertas',
+        marker=dict(color='crimson', size=6 + 3 * np.sqrt(n_alerts[alert_days].values), symbol='triangle-up'),
+        customdata=np.column_stack([totals, n_alerts[alert_days].values, names]).astype(object) if names else None,
+        hovertemplate="%{x|%Y-%m-%d}<br>Total nacional: %{customdata[0]}"
+                      "<br>%{customdata[1]} series: %{customdata[2]}<extra></extra>"
+    ))
+    fig.update_layout(title=f"Alertas {surveillance.LABELS[method]} por región y grupo de edad",
+                      template='plotly_white', xaxis_title='Fecha', yaxis_title='Casos')
+    st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+    st.caption(f"{len(alert_days)} de {len(national)} días marcados: {int(national_flags.sum())} con alerta "
+               f"en el total nacional y {int((n_alerts >= min_series).sum())} con al menos {min_series} "
+               f"de {len(series_labels)} series en alerta.")
+
+    # Trend/seasonal decomposition and Holt-Winters forecast, fitted for
+    # every region at once and kept up to date as days arrive
+    st.subheader("Descomposición y Pronóstico")
+    periods = [period for period in forecasting.PERIODS if len(cube.dates) >= 2 * period]
+    if not periods:
+        st.info("No hay suficientes días para descomponer la serie.")
+    else:
+        forecast_cols = st.columns(3)
+        region = forecast_cols[0].selectbox("Región", list(metrics.columns),
+                                            index=metrics.columns.get_loc(epi_metrics.TOTAL), key="forecast-region")
+        period = forecast_cols[1].selectbox("Estacionalidad", periods, format_func=forecasting.PERIODS.get,
+                                            key="forecast-period")
+        horizon = forecast_cols[2].slider("Días a pronosticar", 7, 90, 28, key="forecast-horizon")
+        components = {name: frame.loc[pd.Timestamp(start):pd.Timestamp(end), region]
+                      for name, frame in live.decomposition(period).items()}
+        mean, low, high = (frame[region] for frame in live.forecast(horizon, period))
+
+        fig = go.Figure([
+            go.Scatter(x=components['observed'].index, y=components['observed'].values, mode='lines',
+                       name=forecasting.LABELS['observed'], line=dict(color='lightgray')),
+            go.Scatter(x=components['trend'].index, y=components['trend'].values, mode='lines',
+                       name=forecasting.LABELS['trend']),
+            go.Scatter(x=high.index, y=high.values, mode='lines', line=dict(width=0),
+                       showlegend=False, hoverinfo='skip'),
+            go.Scatter(x=low.index, y=np.maximum(low.values, 0), mode='lines', line=dict(width=0),
+                       fill='tonexty', fillcolor='rgba(239, 85, 59, 0.2)', name='Intervalo 95%'),
+            go.Scatter(x=mean.index, y=mean.values, mode='lines', name='Pronóstico',
+                       line=dict(color='#EF553B', dash='dash')),
+        ])
+        fig.update_layout(title=f"Pronóstico Holt-Winters de casos: {region}", template='plotly_white',
+                          hovermode='x unified', xaxis_title='Fecha', yaxis_title='Casos')
+        st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+
+        fig = go.Figure([go.Scatter(x=components[name].index, y=components[name].values, mode='lines',
+                                    name=forecasting.LABELS[name]) for name in ('seasonal', 'resid')])
+        fig.update_layout(title="Componentes estacional y residual", template='plotly_white',
+                          hovermode='x unified', xaxis_title='Fecha')
+        st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+
+    # New records update the cube, rolling means and statistics in place,
+    # for this session only
+    with st.expander("⏱️ Datos que llegan cada día"):
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            if "sample_spec" not in df.attrs:
+                st.caption("La simulación solo está disponible para los datos de ejemplo.")
+            elif st.button("➕ Simular un nuevo día"):
+                append_next_day(df)
+                st.rerun()
+            st.metric("Versión de los datos", live.version)
+            st.caption(f"Último día: {live.cube.dates[-1]:%Y-%m-%d}")
+            st.caption("Los días simulados solo se ven en esta sesión y no se guardan.")
+        with col2:
+            st.write("Estadísticas descriptivas acumuladas:")
+            st.dataframe(live.stats.describe())
     
     # Advanced Plotly
     st.header("Gráficos Avanzados con Plotly")
@@ -2003,25 +2409,30 @@ fig.show()
         
         st.code(hist_code)
         
-        # Example histogram
+        # Example histogram: binned on the server, only the bars are sent
+        bins = st.slider("Número de intervalos", min_value=5, max_value=100, value=25, key="hist-bins")
+        histogram = live.histogram('cases')
+        edges, counts = histogram.rebin(bins)
+        widths = np.diff(edges)
         fig = go.Figure()
         
-        fig.add_trace(go.Histogram(
-            x=df['cases'],
-            nbinsx=25,
+        fig.add_trace(go.Bar(
+            x=edges[:-1] + widths / 2,
+            y=counts,
+            width=widths,
             marker_color='#3498db',
             opacity=0.7,
             name='Casos'
         ))
         
-        # Add KDE density line
-        kde_x = np.linspace(df['cases'].min(), df['cases'].max(), 1000)
-        kde = stats.gaussian_kde(df['cases'].dropna())
-        kde_y = kde(kde_x)
+        # Add KDE density line (binned FFT estimate, cached per data version),
+        # scaled from density to counts per bin
+        cases = region_days['cases']
+        kde_x, kde_y = live.density('cases')
         
         fig.add_trace(go.Scatter(
             x=kde_x, 
-            y=kde_y * df['cases'].count() * (df['cases'].max() - df['cases'].min()) / 25,
+            y=kde_y * histogram.total * widths.mean(),
             mode='lines', 
             name='Densidad',
             line=dict(color='red', width=2)
@@ -2032,16 +2443,16 @@ fig.show()
             title='Distribución de Casos COVID-19',
             xaxis_title='Número de Casos',
             yaxis_title='Frecuencia',
-            bargap=0.1,
+            bargap=0,
             template='plotly_white'
         )
         
         # Add vertical lines for statistics
-        stats = df['cases'].describe()
-        fig.add_vline(x=stats['mean'], line_dash='dash', line_color='green', annotation_text='Media')
-        fig.add_vline(x=stats['50%'], line_dash='dash', line_color='orange', annotation_text='Mediana')
+        case_stats = cases.describe()
+        fig.add_vline(x=case_stats['mean'], line_dash='dash', line_color='green', annotation_text='Media')
+        fig.add_vline(x=case_stats['50%'], line_dash='dash', line_color='orange', annotation_text='Mediana')
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
     
     with plotly_tabs[1]:
         st.subheader("Gráfico de Dispersión con Dimensiones Adicionales")
@@ -2085,3 +2496,131 @@ fig.add_shape(
 fig.show()
         """
         
+        st.code(scatter_code)
+        
+        # Example scatter (one point per region and day): WebGL when large,
+        # a server-side density image above raster.RASTER_POINTS
+        labels = {
+            'cases': 'Casos',
+            'hospitalized': 'Hospitalizaciones',
+            'tests': 'Pruebas Realizadas',
+            'region': 'Región'
+        }
+        title = 'Relación entre Casos, Hospitalizaciones y Pruebas por Región'
+        rasterized = len(region_days) > raster.RASTER_POINTS
+        if rasterized:
+            fig = raster.density_figure(
+                region_days['cases'], region_days['hospitalized'], region_days['region'],
+                size=region_days['tests'],
+                names={'x': labels['cases'], 'y': labels['hospitalized'],
+                       'size': labels['tests'], 'category': labels['region']}
+            )
+            fig.update_layout(title=title)
+        else:
+            fig = px.scatter(
+                region_days, 
+                x='cases', 
+                y='hospitalized',
+                color='region',
+                size='tests',
+                hover_name='date',
+                size_max=15,
+                opacity=0.7,
+                title=title,
+                labels=labels
+            )
+        
+        fig.update_layout(
+            template='plotly_white',
+            legend_title='Región',
+            xaxis=dict(showgrid=True),
+            yaxis=dict(showgrid=True)
+        )
+        
+        # Trend line through the origin with the overall ratio
+        ratio = region_days['hospitalized'].mean() / region_days['cases'].mean()
+        fig.add_shape(
+            type="line",
+            line=dict(color="red", width=2, dash="dot"),
+            x0=region_days['cases'].min(),
+            y0=region_days['cases'].min() * ratio,
+            x1=region_days['cases'].max(),
+            y1=region_days['cases'].max() * ratio
+        )
+        
+        st.plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+        if rasterized:
+            st.caption(f"{len(region_days):,} puntos agregados en una imagen de densidad "
+                       f"(más de {raster.RASTER_POINTS:,}); pasa el cursor para ver cada celda.")
+        else:
+            st.caption(f"{len(region_days):,} puntos; por encima de {plotly_payload.WEBGL_POINTS:,} "
+                       "se dibujan con WebGL.")
+    
+    with plotly_tabs[3]:
+        st.subheader("Dashboard Personalizado")
+        st.write("""
+        Todos los gráficos usan la misma selección de filas. Cada filtro es un índice de bits
+        precalculado y combinarlos es un AND bit a bit, así que cambiar un filtro no recorre
+        las columnas de nuevo.
+        """)
+        
+        index = crossfilter_for(df)
+        filter_cols = st.columns(4)
+        filters = {
+            'region': filter_cols[0].multiselect("Región", list(index.labels['region']), key="xf-region"),
+            'age_group': filter_cols[1].multiselect("Grupo de edad", list(index.labels['age_group']), key="xf-age"),
+            'gender': filter_cols[2].multiselect("Género", list(index.labels['gender']), key="xf-gender"),
+        }
+        first, last = pd.Timestamp(index.dates[0]).date(), pd.Timestamp(index.dates[-1]).date()
+        dates = filter_cols[3].date_input("Fechas", value=(first, last), min_value=first,
+                                          max_value=last, key="xf-dates")
+        if isinstance(dates, (tuple, list)) and len(dates) == 2:
+            filters['date'] = tuple(dates)
+        
+        started = time.perf_counter()
+        selection = index.select(filters)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        st.metric("Filas seleccionadas", f"{selection.count():,}", f"de {index.n_rows:,}", delta_color="off")
+        st.caption(f"Filtro combinado en {elapsed_ms:.2f} ms")
+        
+        linked = st.columns(2)
+        daily_cases = index.sum(selection, 'date', 'cases')
+        fig = go.Figure(go.Scatter(x=daily_cases.index, y=daily_cases.values, mode='lines',
+                                   line=dict(color='#E76F51')))
+        fig.update_layout(title='Casos por día', template='plotly_white', height=320)
+        linked[0].plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+        
+        by_region = index.sum(selection, 'region', 'cases')
+        fig = go.Figure(go.Bar(x=by_region.index.astype(str), y=by_region.values, marker_color='#2A9D8F'))
+        fig.update_layout(title='Casos por región', template='plotly_white', height=320)
+        linked[1].plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+        
+        by_age = index.sum(selection, 'age_group', 'hospitalized')
+        fig = go.Figure(go.Bar(x=by_age.index.astype(str), y=by_age.values, marker_color='#264653'))
+        fig.update_layout(title='Hospitalizaciones por grupo de edad', template='plotly_white', height=320)
+        linked[0].plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+        
+        by_gender = index.sum(selection, 'gender')
+        fig = go.Figure(go.Pie(labels=by_gender.index.astype(str), values=by_gender.values, hole=0.4))
+        fig.update_layout(title='Registros por género', height=320)
+        linked[1].plotly_chart(plotly_payload.optimize(fig), use_container_width=True)
+        
+
+# Page table: sidebar order, URL slugs and render functions
+PAGES = [
+    router.Page("introduccion", "🏠 Introducción", show_introduction, False),
+    router.Page("que-es-python", "🐍 ¿Qué es Python?", show_what_is_python, False),
+    router.Page("por-que-python", "📊 ¿Por qué Python?", show_why_python, False),
+    router.Page("configuracion", "⚙️ Configuración del Entorno", show_setup, False),
+    router.Page("primer-script", "👨‍💻 Tu Primer Script", show_hello_world, False),
+    router.Page("cargar-datos", "📋 Cargar y Visualizar Datos", show_load_preview, True),
+    router.Page("tipos-de-datos", "🔤 Entender Tipos de Datos", show_data_types, True, []),
+    router.Page("personalizar-graficos", "🎨 Personalizar y Guardar Gráficos", show_customize_plots, True, []),
+    router.Page("graficos-interactivos", "📱 Gráficos Interactivos", show_interactive, True, []),
+    router.Page("estadistica", "🧮 Análisis Estadístico", None, True),
+    router.Page("flujos-de-trabajo", "🔄 Flujos de Trabajo", None, False),
+    router.Page("descargar", "📚 Descargar eBook", None, False),
+]
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Cold start / first-paint benchmark.
+#
+# Every sample runs in a fresh interpreter, renders the default page once
+# with Streamlit's AppTest and reports the wall time, comparing eager imports
+# (HEALTH_GUIDE_EAGER_IMPORTS=1, the old behaviour) with lazy imports.
+#
+#   python benchmarks/cold_start.py [runs]
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = f"""
+import sys, time
+sys.path.insert(0, {ROOT!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_string("import sys\\nsys.path.insert(0, {ROOT!r})\\nimport app\\napp.main()", default_timeout=300)
+at.run()
+assert not at.exception, [e.value for e in at.exception]
+print(time.perf_counter() - start)
+"""
+
+
+def cold_run(eager):
+    env = dict(os.environ, HEALTH_GUIDE_EAGER_IMPORTS="1" if eager else "0")
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for label, eager in [("eager imports", True), ("lazy imports", False)]:
+        samples = [cold_run(eager) for _ in range(runs)]
+        print(f"{label:>14}: median {statistics.median(samples) * 1000:.0f} ms "
+              f"(min {min(samples) * 1000:.0f} ms, {runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Holt-Winters fitting speed and accuracy: forecasting.HoltWinters fitted
+# on all series at once against one fit per series in a loop, on synthetic
+# series shaped like the sample data (trend, weekly cycle, noise). The
+# forecast error over the held-out last days is compared with the
+# seasonal naive forecast (same weekday of the last week).
+#
+#   python benchmarks/forecasting.py [series] [days]
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import forecasting  # noqa: E402
+
+HORIZON = 28
+PERIOD = 7
+
+
+def main():
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    rng = np.random.default_rng(0)
+    t = np.arange(days + HORIZON)[:, None]
+    level = rng.uniform(20, 200, n_series)
+    values = (level * (1 + t / days) + 0.2 * level * np.sin(2 * np.pi * t / PERIOD + rng.uniform(0, 6, n_series))
+              + rng.normal(0, 0.05, (len(t), n_series)) * level)
+    history, future = values[:days], values[days:]
+
+    start = time.perf_counter()
+    model = forecasting.HoltWinters(history, PERIOD)
+    batched_s = time.perf_counter() - start
+
+    looped = min(n_series, 50)
+    start = time.perf_counter()
+    for series in range(looped):
+        forecasting.HoltWinters(history[:, [series]], PERIOD)
+    loop_s = (time.perf_counter() - start) / looped * n_series
+
+    mean, low, high = model.forecast(HORIZON)
+    naive = history[-PERIOD:][np.arange(HORIZON) % PERIOD]
+    scale = np.abs(future).mean()
+    covered = ((future >= low) & (future <= high)).mean()
+    print(f"{n_series:,} series x {days} days: batched {batched_s:.2f} s,"
+          f" per-series loop ~{loop_s:.2f} s ({loop_s / batched_s:.0f}x)")
+    print(f"{HORIZON}-day error: Holt-Winters {np.abs(mean - future).mean() / scale:.1%},"
+          f" seasonal naive {np.abs(naive - future).mean() / scale:.1%};"
+          f" 95% interval coverage {covered:.1%}")
+
+
+if __name__ == "__main__":
+    main()
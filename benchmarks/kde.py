@@ -0,0 +1,50 @@
+# KDE accuracy and speed: kde.estimate and kde.from_histogram against
+# scipy.stats.gaussian_kde on skewed, count-like samples of growing size,
+# all evaluated at 1000 points between the sample minimum and maximum.
+# The error is the largest absolute difference relative to the peak of the
+# scipy curve.
+#
+#   python benchmarks/kde.py [largest n]
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import binning  # noqa: E402
+import kde  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    from scipy import stats
+
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    n = 1_000
+    while n <= largest:
+        values = rng.negative_binomial(5, 0.05, size=n)
+        points = np.linspace(values.min(), values.max(), 1000)
+
+        reference, scipy_s = timed(lambda: stats.gaussian_kde(values)(points))
+        (_, binned), binned_s = timed(kde.estimate, values, points)
+        histogram = binning.Histogram.from_values(values)
+        (_, from_bins), bins_s = timed(kde.from_histogram, histogram, points)
+
+        peak = reference.max()
+        print(f"n={n:>9,}  scipy {scipy_s * 1000:8.1f} ms"
+              f" | estimate {binned_s * 1000:6.1f} ms, error {np.abs(binned - reference).max() / peak:.1e}"
+              f" | from_histogram {bins_s * 1000:6.1f} ms, error {np.abs(from_bins - reference).max() / peak:.1e}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
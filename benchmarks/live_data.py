@@ -0,0 +1,77 @@
+# live_data check: LiveDataset.append against a LiveDataset rebuilt from
+# all the records, on the sample dataset. Appends the next day, then a day
+# after a gap of several days (the cube zero-fills the days between), then
+# records of a day already stored, with every cache warmed before each
+# append. Prints the append time and exits with status 1 when a result
+# differs from the rebuild.
+#
+#   python benchmarks/live_data.py
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import live_data  # noqa: E402
+import sample_data  # noqa: E402
+
+
+def build(frame):
+    return live_data.LiveDataset.from_frames(lambda columns: [frame[[c for c in columns if c in frame]]])
+
+
+def warm(live):
+    live.rolling_mean(7)
+    live.histogram()
+    live.alerts()
+    live.forecast(7)
+
+
+# Names of the results that differ between the two datasets
+def differences(live, rebuilt):
+    checks = {
+        'daily_totals': lambda d: d.daily_totals().to_numpy(),
+        'rolling_mean': lambda d: d.rolling_mean(7).to_numpy(),
+        'stats': lambda d: d.stats.describe().to_numpy(),
+        'histogram': lambda d: np.concatenate(d.histogram().rebin(50)),
+        'alerts': lambda d: np.column_stack([*d.alerts()[1].values(), *d.alerts()[2].values()]),
+        'forecast': lambda d: d.forecast(7)[0].to_numpy(),
+    }
+    return [name for name, result in checks.items()
+            if not np.allclose(result(live), result(rebuilt), rtol=1e-6, equal_nan=True)]
+
+
+def main():
+    frame = sample_data.generate_health_data()
+    live = build(frame)
+    last = live.cube.dates[-1]
+    appends = {
+        'next day': sample_data.next_day(last + pd.Timedelta(days=1)),
+        'after a 4-day gap': sample_data.next_day(last + pd.Timedelta(days=6)),
+        'stored day': frame[frame['date'] == last - pd.Timedelta(days=30)],
+    }
+    failed = False
+    for label, records in appends.items():
+        warm(live)
+        start = time.perf_counter()
+        try:
+            live.append(records)
+        except Exception as error:
+            print(f"{label:>18}: append() failed: {error!r}")
+            failed = True
+            break
+        elapsed = time.perf_counter() - start
+        frame = pd.concat([frame, records], ignore_index=True)
+        different = differences(live, build(frame))
+        failed |= bool(different)
+        print(f"{label:>18}: {len(records):,} records in {elapsed * 1000:.1f} ms, "
+              + (f"differs in {', '.join(different)}" if different else "same as a rebuild"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
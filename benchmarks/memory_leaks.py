@@ -0,0 +1,60 @@
+# Memory leak check.
+#
+# Renders every page several times in one process with Streamlit's AppTest,
+# with tracemalloc on (HEALTH_GUIDE_TRACE_MEMORY=1) and the figure cache off
+# so every run really draws. Prints the memory each page keeps per run after
+# the warm-up runs and exits with status 1 when a page keeps growing or
+# leaves pyplot figures open.
+#
+#   python benchmarks/memory_leaks.py [runs] [limit KB per run]
+import os
+import sys
+
+os.environ["HEALTH_GUIDE_TRACE_MEMORY"] = "1"
+os.environ["HEALTH_GUIDE_FIGURE_CACHE_MB"] = "0"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCRIPT = f"import sys\nsys.path.insert(0, {ROOT!r})\nimport app\napp.main()"
+
+
+def run_page(slug, runs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(SCRIPT, default_timeout=300)
+    at.query_params["page"] = slug
+    for _ in range(runs):
+        at.run()
+        assert not at.exception, [e.value for e in at.exception]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    limit_kb = float(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    run_page("introduccion", 1)
+    app = sys.modules["app"]
+    import memory_trace
+
+    leaking = []
+    for page in app.PAGES:
+        if page.render is None:
+            continue
+        run_page(page.slug, runs)
+        growth_kb = memory_trace.growth(page.slug) / 1024
+        pyplot = sys.modules.get("matplotlib.pyplot")
+        open_figures = len(pyplot.get_fignums()) if pyplot else 0
+        status = "ok"
+        if growth_kb > limit_kb or open_figures:
+            status = "LEAK"
+            leaking.append(page.slug)
+        print(f"{page.slug:>24}: {growth_kb:+8.1f} KB/run, {open_figures} open figures  {status}")
+
+    if leaking:
+        print(f"Pages leaking memory: {', '.join(leaking)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
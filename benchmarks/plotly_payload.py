@@ -0,0 +1,119 @@
+# plotly_payload check: optimize() on figures shaped like the app's. One
+# figure has a trace of every type the app draws (scatter with sized
+# markers, bars, histogram, heatmap), below and above the WebGL threshold;
+# the others are the region scatter of the interactive page (dates in the
+# hover text) and daily line charts of one and ten years. Prints the
+# payload size before and after, and exits with status 1 when optimize()
+# fails or changes a chart: trace types, the x values of evenly spaced
+# traces, or the extremes of thinned lines.
+#
+#   python benchmarks/plotly_payload.py [points]
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import plotly_payload  # noqa: E402
+
+
+def mixed(points):
+    import plotly.graph_objects as go
+
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2023-01-01', periods=points, freq='h')
+    values = rng.normal(100, 20, points)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=values, mode='markers',
+                             marker=dict(size=rng.integers(3, 12, points))))
+    fig.add_trace(go.Bar(x=['North', 'South', 'East'], y=[10.123, 20.456, 30.789],
+                         marker=dict(color='steelblue')))
+    fig.add_trace(go.Histogram(x=values, marker=dict(color='crimson')))
+    fig.add_trace(go.Heatmap(z=rng.random((10, 10))))
+    return fig
+
+
+def region_scatter(n_regions, days=365):
+    import plotly.express as px
+
+    rng = np.random.default_rng(0)
+    points = n_regions * days
+    frame = pd.DataFrame({
+        'date': np.tile(pd.date_range('2023-01-01', periods=days), n_regions),
+        'region': np.repeat([f"Region {i}" for i in range(n_regions)], days),
+        'cases': rng.poisson(40, points),
+        'hospitalized': rng.poisson(4, points),
+        'tests': rng.poisson(400, points),
+    })
+    return px.scatter(frame, x='cases', y='hospitalized', color='region', size='tests',
+                      hover_name='date', size_max=15, opacity=0.7)
+
+
+def daily_lines(days):
+    import plotly.graph_objects as go
+
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2014-01-01', periods=days)
+    trend = 200 + 50 * np.sin(np.arange(days) / 30)
+    return go.Figure([go.Scatter(x=dates, y=rng.poisson(trend * scale).astype(float), mode='lines', name=name)
+                      for name, scale in (('cases', 1), ('recovered', 0.9), ('hospitalized', 0.1))])
+
+
+# Ways optimize() changed the chart drawn from `before` into `after`
+def changes(before, after):
+    found = []
+    for old, new in zip(before.data, after.data):
+        if new.type in ('scatter', 'scattergl') and new.x is None and new.x0 is not None:
+            x = np.asarray(old.x)
+            if np.issubdtype(x.dtype, np.datetime64):
+                x = x.astype('datetime64[ms]').astype(np.int64)
+                first = pd.Timestamp(new.x0).value // 10 ** 6
+            else:
+                first = new.x0
+            if not np.array_equal(x, first + new.dx * np.arange(len(x))):
+                found.append(f"x0/dx of {old.name or old.type}")
+        if getattr(old, 'mode', None) == 'lines' and len(new.y) < len(old.y):
+            if (np.min(old.y), np.max(old.y)) != (np.min(new.y), np.max(new.y)):
+                found.append(f"extremes of {old.name or old.type}")
+    return found
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    figures = {
+        f"{min(points, plotly_payload.WEBGL_POINTS // 2):,} mixed points":
+            (mixed, min(points, plotly_payload.WEBGL_POINTS // 2)),
+        f"{points:,} mixed points": (mixed, points),
+        "region scatter, 50 regions": (region_scatter, 50),
+        "daily lines, 1 year": (daily_lines, 365),
+        "daily lines, 10 years": (daily_lines, 3650),
+    }
+    failed = False
+    for label, (build, size) in figures.items():
+        fig = build(size)
+        original = build(size)
+        before = len(fig.to_json())
+        try:
+            plotly_payload.optimize(fig)
+        except Exception as error:
+            print(f"{label:>28}: optimize() failed: {error!r}")
+            failed = True
+            continue
+        problems = changes(original, fig)
+        if build is mixed:
+            types = [trace.type for trace in fig.data]
+            expected = ['scattergl' if size > plotly_payload.WEBGL_POINTS else 'scatter', 'bar', 'histogram', 'heatmap']
+            if types != expected:
+                problems.append(f"traces {types}, expected {expected}")
+        failed |= bool(problems)
+        after = len(fig.to_json())
+        print(f"{label:>28}: {before / 1024:,.0f} KB -> {after / 1024:,.0f} KB ({before / after:.1f}x)"
+              + (f"; changed {', '.join(problems)}" if problems else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Outbreak detection throughput: surveillance.Detector over thousands of
+# Poisson series with a few injected outbreaks, fed one day at a time as
+# the app does when data arrives. Reports series-days per second and how
+# many of the injected outbreaks each method flags.
+#
+#   python benchmarks/surveillance.py [series] [days]
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import surveillance  # noqa: E402
+
+
+def main():
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    rng = np.random.default_rng(0)
+    rates = rng.gamma(2.0, 10.0, size=n_series)
+    counts = rng.poisson(rates, size=(days, n_series)).astype(np.float64)
+
+    # One week-long outbreak at twice the rate in 1% of the series
+    hit = rng.choice(n_series, size=max(1, n_series // 100), replace=False)
+    onset = rng.integers(30, days - 7, size=len(hit))
+    for series, day in zip(hit, onset):
+        counts[day:day + 7, series] += rng.poisson(rates[series], size=7)
+
+    detector = surveillance.Detector(n_series)
+    start = time.perf_counter()
+    alerts = detector.run(counts)
+    elapsed = time.perf_counter() - start
+    print(f"{n_series:,} series x {days} days in {elapsed:.2f} s"
+          f" ({n_series * days / elapsed:,.0f} series-days/s)")
+
+    outbreak = np.zeros(counts.shape, dtype=bool)
+    for series, day in zip(hit, onset):
+        outbreak[day:day + 7, series] = True
+    for method in surveillance.METHODS:
+        flags = alerts[method]
+        found = np.mean([flags[day:day + 7, series].any() for series, day in zip(hit, onset)])
+        false_rate = flags[~outbreak].mean()
+        print(f"{surveillance.LABELS[method]:>8}: {found:6.1%} outbreaks found,"
+              f" {false_rate:.2%} alerts outside outbreaks")
+
+
+if __name__ == "__main__":
+    main()
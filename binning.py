@@ -0,0 +1,88 @@
+# Server-side histograms. Values are counted once into many narrow bins
+# of equal width; a chart then asks for any number of bins and gets them by
+# summing neighbouring narrow bins, so changing the bin count never reads
+# the data again. New values are added to the counts, widening the range
+# by whole bins when they fall outside it. Charts draw the result as bars.
+import math
+
+import numpy as np
+
+# Narrow bins a histogram starts with; rebin() can return at most these
+FINE_BINS = 1024
+
+
+class Histogram:
+    # Bin i counts the values in [start + i * width, start + (i + 1) * width);
+    # for float values the last bin also holds its right edge, so the
+    # maximum does not open a bin of its own. integer: whole numbers.
+    def __init__(self, start, width, counts, integer=False):
+        self.start = start
+        self.width = width
+        self.counts = counts
+        self.integer = integer
+
+    # integer: use whole-number bin widths and edges (default: from dtype)
+    @classmethod
+    def from_values(cls, values, fine_bins=FINE_BINS, integer=None):
+        values = _finite(values)
+        if integer is None:
+            integer = values.dtype.kind in 'biu'
+        if len(values) == 0:
+            return cls(0.0, 1.0, np.zeros(0, dtype=np.int64), integer)
+        lo, hi = values.min(), values.max()
+        if integer:
+            width = float(max(1, math.ceil((hi - lo + 1) / fine_bins)))
+        else:
+            width = float(hi - lo) / fine_bins or 1.0
+        empty = cls(float(lo), width, np.zeros(fine_bins, dtype=np.int64), integer)
+        return empty.update(values)
+
+    @property
+    def edges(self):
+        return self.start + self.width * np.arange(len(self.counts) + 1)
+
+    # Mean position of the values a bin can hold
+    @property
+    def centers(self):
+        offset = (self.width - 1) / 2 if self.integer else self.width / 2
+        return self.start + self.width * np.arange(len(self.counts)) + offset
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    # New histogram with `values` added; this one is left as it is
+    def update(self, values):
+        values = _finite(values)
+        if len(values) == 0:
+            return self
+        index = np.floor((values - self.start) / self.width).astype(np.int64)
+        if not self.integer and len(self.counts):
+            right = self.start + self.width * len(self.counts)
+            on_edge = (index >= len(self.counts)) & np.isclose(values, right, rtol=1e-12, atol=0)
+            index[on_edge] = len(self.counts) - 1
+        before = max(0, -int(index.min()))
+        after = max(0, int(index.max()) + 1 - len(self.counts))
+        counts = np.pad(self.counts, (before, after))
+        counts += np.bincount(index + before, minlength=len(counts))
+        return Histogram(self.start - before * self.width, self.width, counts, self.integer)
+
+    # (edges, counts) with `bins` bins over the range holding values. Bin
+    # edges are narrow-bin edges, so widths differ by at most one narrow bin.
+    def rebin(self, bins):
+        nonzero = np.flatnonzero(self.counts)
+        if len(nonzero) == 0:
+            return np.array([self.start, self.start + self.width]), np.zeros(1, dtype=np.int64)
+        first, last = nonzero[0], nonzero[-1] + 1
+        counts = self.counts[first:last]
+        bins = max(1, min(int(bins), len(counts)))
+        starts = np.unique(np.linspace(0, len(counts), bins + 1).astype(np.int64))
+        edges = self.start + self.width * (first + starts)
+        return edges, np.add.reduceat(counts, starts[:-1])
+
+
+def _finite(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        values = values[np.isfinite(values)]
+    return values
@@ -0,0 +1,49 @@
+# Single-panel charts that can be drawn in another process: module-level
+# functions taking plain arrays and returning a new Figure, so both the
+# function and its data pickle cheaply for render_pool.
+import numpy as np
+
+from lazy_imports import lazy
+
+mpl_figure = lazy("matplotlib.figure")
+
+
+def _axes(figsize, title):
+    fig = mpl_figure.Figure(figsize=figsize)
+    ax = fig.subplots()
+    ax.set_title(title)
+    return fig, ax
+
+
+def line(x, y, title, color=None, rotation=0, figsize=(6, 5)):
+    fig, ax = _axes(figsize, title)
+    ax.plot(x, y, color=color)
+    if rotation:
+        ax.tick_params(axis='x', labelrotation=rotation)
+    fig.tight_layout()
+    return fig
+
+
+# Bars of a histogram already binned (binning.Histogram.rebin)
+def histogram(edges, counts, title, color=None, alpha=1.0, edgecolor=None, figsize=(6, 5)):
+    fig, ax = _axes(figsize, title)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+           color=color, alpha=alpha, edgecolor=edgecolor)
+    fig.tight_layout()
+    return fig
+
+
+def barh(labels, values, title, color=None, figsize=(6, 5)):
+    fig, ax = _axes(figsize, title)
+    ax.barh(labels, values, color=color)
+    fig.tight_layout()
+    return fig
+
+
+def scatter(x, y, title, xlabel='', ylabel='', color=None, alpha=0.5, figsize=(6, 5)):
+    fig, ax = _axes(figsize, title)
+    ax.scatter(x, y, alpha=alpha, color=color)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    fig.tight_layout()
+    return fig
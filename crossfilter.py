@@ -0,0 +1,208 @@
+# Cross-filtering over row-level data with bitmap indexes. Every value of
+# every categorical dimension gets a bitmap of the rows holding it (one bit
+# per row, packed into 64-bit words) and dates get a sorted index, so a
+# combination of filters is a few bitwise ORs/ANDs over n / 64 words
+# instead of comparing every row of every column. All linked charts are
+# then aggregated from the same Selection, on the bitmaps too: integer
+# measures are stored bit-sliced (one bitmap per bit of the value), so a
+# sum is the popcounts of ANDed words weighted by powers of two and the
+# selection is never unpacked into one boolean per row.
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ('region', 'age_group', 'gender')
+MEASURES = ('cases', 'recovered', 'tests', 'hospitalized')
+
+_ONES = np.uint64(0xFFFF_FFFF_FFFF_FFFF)
+_BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+# Integer measures up to this many bits are bit-sliced; others are summed
+# from the unpacked selection
+MAX_SLICES = 40
+
+
+def _pack(mask):
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+# Set bits of every word, along the last axis of an array of words
+def _word_counts(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).astype(np.int64)
+    counts = _BYTE_COUNTS[np.ascontiguousarray(words).view(np.uint8)]
+    return counts.reshape(words.shape + (8,)).sum(axis=-1)
+
+
+def _popcount(words):
+    return int(_word_counts(words).sum())
+
+
+# Set bits of `words` before each bit position
+def _prefix_counts(words, positions):
+    cumulative = np.concatenate([[0], np.cumsum(_word_counts(words))])
+    word, bit = positions // 64, (positions % 64).astype(np.uint64)
+    inside = word < len(words)
+    partial = words[np.where(inside, word, 0)] & ((np.uint64(1) << bit) - np.uint64(1))
+    return cumulative[word] + np.where(inside, _word_counts(partial), 0)
+
+
+# Bitmaps of the bits of non-negative integer values, lowest bit first;
+# None when the values are not such integers
+def _bit_slices(values):
+    if len(values) == 0:
+        return []
+    if not (values >= 0).all() or not (values == np.floor(values)).all():
+        return None
+    top = int(values.max())
+    if top.bit_length() > MAX_SLICES:
+        return None
+    integers = values.astype(np.int64)
+    return [_pack((integers >> bit) & 1 == 1) for bit in range(top.bit_length())]
+
+
+# Rows picked by a combination of filters, as a bitmap
+class Selection:
+    def __init__(self, bits, n_rows):
+        self.bits = bits
+        self.n_rows = n_rows
+
+    def count(self):
+        return _popcount(self.bits)
+
+    def mask(self):
+        return np.unpackbits(self.bits.view(np.uint8), count=self.n_rows, bitorder='little').astype(bool)
+
+    def rows(self):
+        return np.flatnonzero(self.mask())
+
+
+class BitmapIndex:
+    def __init__(self, frame, dimensions=DIMENSIONS, measures=MEASURES):
+        self.n_rows = len(frame)
+        self.words = -(-self.n_rows // 64)
+        self.labels = {}
+        self.codes = {}
+        self.bitmaps = {}
+        for dim in dimensions:
+            if dim not in frame:
+                continue
+            codes, labels = pd.factorize(frame[dim], sort=True)
+            self.labels[dim] = pd.Index(labels)
+            self.codes[dim] = codes
+            # One row of words per value
+            self.bitmaps[dim] = np.zeros((len(labels), self.words), dtype=np.uint64)
+            for code in range(len(labels)):
+                self.bitmaps[dim][code] = _pack(codes == code)
+        self.measures = {name: frame[name].to_numpy(dtype=np.float64, na_value=0)
+                         for name in measures if name in frame}
+        self.slices = {name: _bit_slices(values) for name, values in self.measures.items()}
+
+        # Sorted date index; rows already in date order need no permutation
+        dates = frame['date'].values.astype('datetime64[D]')
+        self.row_dates = dates
+        if len(dates) and not (dates[1:] >= dates[:-1]).all():
+            self._order = np.argsort(dates, kind='stable')
+            self.dates = dates[self._order]
+        else:
+            self._order = None
+            self.dates = dates
+        self.all = self._range_bits(0, self.n_rows)
+        # First sorted position of every day and the end of the dated rows
+        known = self.dates[~np.isnat(self.dates)]
+        self.days, day_starts = np.unique(known, return_index=True)
+        self._day_bounds = np.append(day_starts, len(known))
+
+    # Bitmap of the rows at sorted positions lo..hi-1
+    def _range_bits(self, lo, hi):
+        if self._order is not None:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self._order[lo:hi]] = True
+            return _pack(mask)
+        bits = np.zeros(self.words, dtype=np.uint64)
+        if hi > lo:
+            first, last = lo // 64, (hi - 1) // 64
+            bits[first:last + 1] = _ONES
+            bits[first] &= _ONES << np.uint64(lo % 64)
+            bits[last] &= _ONES >> np.uint64(63 - (hi - 1) % 64)
+        return bits
+
+    # Rows whose date is in [start, end], found by binary search
+    def date_bits(self, start, end):
+        lo = self.dates.searchsorted(np.datetime64(pd.Timestamp(start).date()), side='left')
+        hi = self.dates.searchsorted(np.datetime64(pd.Timestamp(end).date()), side='right')
+        return self._range_bits(lo, hi)
+
+    # filters: {'region': [...], 'age_group': [...], 'gender': [...],
+    #           'date': (start, end)}; values of one dimension are ORed,
+    # dimensions are ANDed
+    def select(self, filters=None):
+        bits = self.all.copy()
+        for dim, values in (filters or {}).items():
+            if dim == 'date' or not values:
+                continue
+            union = np.zeros(self.words, dtype=np.uint64)
+            for code in self.labels[dim].get_indexer(list(values)):
+                if code >= 0:
+                    union |= self.bitmaps[dim][code]
+            bits &= union
+        dates = (filters or {}).get('date')
+        if dates:
+            bits &= self.date_bits(*dates)
+        return Selection(bits, self.n_rows)
+
+    # Sum of a measure (or row count for measure=None) over the selected
+    # rows, grouped by a dimension or by 'date'
+    def sum(self, selection, by, measure=None):
+        if measure is None:
+            slices = [selection.bits]
+        elif self.slices[measure] is not None:
+            slices = [selection.bits & bits for bits in self.slices[measure]]
+        else:
+            return self._sum_rows(selection, by, measure)
+        name = measure or 'rows'
+        # Sums of measures come back as floats, row counts as integers
+        dtype = np.float64 if measure else np.int64
+
+        if by != 'date':
+            groups = self.bitmaps[by]
+            totals = np.zeros(len(groups), dtype=np.int64)
+            for bit, bits in enumerate(slices):
+                totals += _word_counts(groups & bits).sum(axis=1) << bit
+            return pd.Series(totals.astype(dtype), index=self.labels[by].rename(by), name=name)
+
+        # Days are runs of consecutive rows when the rows are in date order
+        if self._order is not None:
+            return self._sum_rows(selection, by, measure)
+        per_day = np.diff(_prefix_counts(selection.bits, self._day_bounds))
+        picked = np.flatnonzero(per_day)
+        if len(picked) == 0:
+            return pd.Series(dtype=dtype, name=name)
+        totals = np.zeros(len(per_day), dtype=np.int64)
+        for bit, bits in enumerate(slices):
+            totals += np.diff(_prefix_counts(bits, self._day_bounds)) << bit
+        days = pd.DatetimeIndex(self.days[picked[0]:picked[-1] + 1])
+        series = pd.Series(totals[picked[0]:picked[-1] + 1].astype(dtype), index=days)
+        index = pd.date_range(days[0], days[-1], freq='D', name='date')
+        return series.reindex(index, fill_value=0).rename(name)
+
+    # Same sums from the unpacked selection, for measures that are not
+    # bit-sliced and rows out of date order
+    def _sum_rows(self, selection, by, measure=None):
+        rows = selection.rows()
+        if by == 'date':
+            rows = rows[~np.isnat(self.row_dates[rows])]
+        else:
+            rows = rows[self.codes[by][rows] >= 0]
+        weights = self.measures[measure][rows] if measure else None
+        if by == 'date':
+            days = self.row_dates[rows]
+            if len(days) == 0:
+                return pd.Series(dtype=np.float64, name=measure or 'rows')
+            first = days.min()
+            totals = np.bincount((days - first).astype(np.int64), weights=weights)
+            index = pd.date_range(pd.Timestamp(first), periods=len(totals), freq='D', name='date')
+            return pd.Series(totals, index=index, name=measure or 'rows')
+        totals = np.bincount(self.codes[by][rows], weights=weights, minlength=len(self.labels[by]))
+        return pd.Series(totals, index=self.labels[by].rename(by), name=measure or 'rows')
@@ -0,0 +1,112 @@
+# Columnar on-disk store for datasets. Each dataset is written once as an
+# uncompressed Arrow IPC file named after its key; every later process or
+# replica memory-maps that file instead of regenerating or unpickling it, and
+# pages convert only the columns they use into pandas.
+import contextlib
+import os
+import threading
+
+from lazy_imports import lazy
+
+pa = lazy("pyarrow")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, ".cache", "datasets")
+
+_lock = threading.Lock()
+
+
+def path_for(key):
+    return os.path.join(STORE_DIR, key + ".arrow")
+
+
+def exists(key):
+    return os.path.exists(path_for(key))
+
+
+def remove(key):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path_for(key))
+
+
+# Arrow IPC writer for a new stored dataset, for data that arrives in
+# chunks. The file is written under a temporary name and renamed when the
+# block exits, so readers never map a partial file. Dictionary columns may
+# grow between batches as long as earlier entries keep their positions.
+@contextlib.contextmanager
+def writer(key, schema):
+    path = path_for(key)
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, schema, options=options) as ipc_writer:
+                yield ipc_writer
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Write a DataFrame as an Arrow IPC file, with optional string metadata
+# kept in the schema
+def write(key, df, metadata=None):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            **{name.encode(): value.encode() for name, value in metadata.items()}
+        })
+    with writer(key, table.schema) as ipc_writer:
+        ipc_writer.write_table(table, max_chunksize=1_000_000)
+    return path_for(key)
+
+
+# Memory-map a stored dataset; the Table references the file's pages
+# directly, so it costs no heap memory until columns are converted
+def open_table(key):
+    source = pa.memory_map(path_for(key), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+# Return the stored Table, building and writing it first when missing.
+# build() returns a DataFrame or a (DataFrame, metadata) pair. Concurrent
+# builders in one process wait for each other instead of generating the
+# same dataset twice.
+def load_or_build(key, build):
+    if not exists(key):
+        with _lock:
+            if not exists(key):
+                built = build()
+                if isinstance(built, tuple):
+                    write(key, *built)
+                else:
+                    write(key, built)
+    return open_table(key)
+
+
+# Metadata stored with write(), as a str -> str dict
+def metadata(table):
+    stored = table.schema.metadata or {}
+    return {name.decode(): value.decode() for name, value in stored.items() if name != b"pandas"}
+
+
+# Convert a Table (or just some of its columns) into a DataFrame. Numeric
+# columns without nulls stay zero-copy views over the mapped file. The
+# stored metadata is available as df.attrs.
+def to_frame(table, columns=None):
+    if columns is not None:
+        table = table.select([name for name in columns if name in table.column_names])
+    df = table.to_pandas(split_blocks=True)
+    df.attrs.update(metadata(table))
+    return df
+
+
+# Convert a Table (or some of its columns) into DataFrames of at most
+# `rows` rows, one at a time
+def iter_frames(table, columns=None, rows=1_000_000):
+    if columns is not None:
+        table = table.select([name for name in columns if name in table.column_names])
+    for batch in table.to_batches(max_chunksize=rows):
+        yield batch.to_pandas()
@@ -0,0 +1,98 @@
+# Downsampling for long time series. A chart never needs more points than
+# it has pixels across: lttb() keeps the points that best preserve the
+# shape of the line (Largest-Triangle-Three-Buckets, Steinarsson 2013) and
+# envelope() gives the min/max of every bucket, drawn as a band so spikes
+# dropped by LTTB stay visible. Series shorter than the target pass through.
+import numpy as np
+
+# Upper bound of points sent per series, whatever the width
+MAX_POINTS = 4000
+# Assumed width of a full-width Plotly chart in the wide layout
+PLOTLY_WIDTH_PX = 1400
+
+
+def target_points(width_px, points_per_pixel=1, max_points=MAX_POINTS):
+    return int(min(max(width_px * points_per_pixel, 3), max_points))
+
+
+# Dates become float days so they can be measured like any other axis
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64) / 86_400e9
+    x = x.astype(np.float64)
+    return x - x[0] if len(x) else x
+
+
+# Bucket boundaries splitting positions lo..hi into n runs of (almost)
+# equal length, none empty
+def _edges(lo, hi, n):
+    return np.linspace(lo, hi, n + 1).astype(np.int64)
+
+
+# Indices of the n_out points LTTB keeps, first and last included
+def lttb(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets between the first and the last point
+    edges = _edges(1, n - 1, n_out - 2)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # The last bucket looks ahead to the last point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+# Indices of the minimum and maximum of each of n_buckets runs of y, in
+# order: the M4-style reduction that keeps every extreme
+def minmax(y, n_buckets):
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(_edges(0, n, n_buckets)))
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+# (x at the start of each bucket, bucket minimum, bucket maximum)
+def envelope(x, y, n_buckets):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n_buckets = min(n_buckets, len(y))
+    starts = _edges(0, len(y), n_buckets)[:-1]
+    return x[starts], np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
+# A series thinned for a chart `width_px` pixels wide; NaN points are
+# dropped first. method: 'lttb' or 'minmax'.
+def series(x, y, width_px, method='lttb', max_points=MAX_POINTS):
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    n_out = target_points(width_px, max_points=max_points)
+    if method == 'lttb':
+        keep = lttb(x, y, n_out)
+    elif method == 'minmax':
+        keep = minmax(y, n_out // 2)
+    else:
+        raise ValueError(f"method must be 'lttb' or 'minmax', got {method!r}")
+    return x[keep], y[keep]
@@ -0,0 +1,87 @@
+# Compact dtypes for every dataset entering the app: low-cardinality text
+# columns become categoricals (stored as Arrow dictionary arrays) and integer
+# columns are downcast to the smallest type that holds their range.
+import io
+import sys
+
+import numpy as np
+import pandas as pd
+
+# A text column becomes categorical when at most this share of its values
+# are distinct
+MAX_CATEGORY_RATIO = 0.5
+
+REPORT_COLUMNS = ['dtype_before', 'bytes_before', 'dtype_after', 'bytes_after']
+
+
+def _is_text(col):
+    return pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)
+
+
+def _compact(col, max_category_ratio):
+    if isinstance(col.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(col):
+        return col
+    if pd.api.types.is_integer_dtype(col):
+        return pd.to_numeric(col, downcast='integer')
+    if _is_text(col) and len(col):
+        distinct = col.nunique(dropna=True)
+        if distinct <= max(1, len(col) * max_category_ratio):
+            return col.astype('category')
+    return col
+
+
+# dtype and deep memory usage of a column as plain text: a categorical is
+# measured as the object column it stands for (a pointer per row plus the
+# string object of every row, as pandas counts it) without building it
+def _text_usage(col):
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        return str(col.dtype), int(col.memory_usage(deep=True, index=False))
+    sizes = np.array([sys.getsizeof(value) for value in col.cat.categories] + [sys.getsizeof(None)],
+                     dtype=np.int64)
+    codes = col.cat.codes.to_numpy()
+    counts = np.bincount(np.where(codes < 0, len(sizes) - 1, codes), minlength=len(sizes))
+    return 'object', 8 * len(col) + int(counts @ sizes)
+
+
+# Per-column dtype and deep memory usage before and after, with a total row.
+# as_text: measure categorical columns of `before` as the text columns they
+# replace, for data generated with categoricals already
+def memory_report(before, after, as_text=False):
+    if as_text:
+        usage = [_text_usage(col) for _, col in before.items()]
+        dtypes = pd.Series([dtype for dtype, _ in usage], index=before.columns)
+        sizes = pd.Series([size for _, size in usage], index=before.columns)
+    else:
+        dtypes, sizes = before.dtypes.astype(str), before.memory_usage(deep=True, index=False)
+    return usage_report(dtypes, sizes, after.dtypes.astype(str), after.memory_usage(deep=True, index=False))
+
+
+# Same report from per-column dtypes and byte counts (pd.Series by column)
+# measured separately, e.g. summed over the chunks of a streamed file
+def usage_report(dtypes_before, bytes_before, dtypes_after, bytes_after):
+    report = pd.DataFrame({
+        'dtype_before': dtypes_before,
+        'bytes_before': bytes_before,
+        'dtype_after': dtypes_after,
+        'bytes_after': bytes_after,
+    }, columns=REPORT_COLUMNS)
+    report.loc['total'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    return report
+
+
+# Return (optimized DataFrame, memory report). The input is left untouched.
+def optimize(df, max_category_ratio=MAX_CATEGORY_RATIO, as_text=False):
+    optimized = pd.DataFrame(
+        {name: _compact(col, max_category_ratio) for name, col in df.items()},
+        index=df.index
+    )
+    return optimized, memory_report(df, optimized, as_text)
+
+
+# Reports travel with the stored dataset as JSON text
+def dumps_report(report):
+    return report.to_json(orient='split')
+
+
+def loads_report(text):
+    return pd.read_json(io.StringIO(text), orient='split', dtype=False)
@@ -0,0 +1,79 @@
+# Epidemiological indicators per region and for the whole country, all
+# from running cumulative sums: every window sum is cumsum[t] - cumsum[t-w],
+# O(days) whatever the window, and every region is one column of the same
+# array, so all series are computed at once.
+import numpy as np
+import pandas as pd
+
+WINDOWS = (7, 14, 28)
+TOTAL = 'Total'
+PER = 100_000
+
+# Indicator name -> label shown in the app
+LABELS = {
+    **{f'cases_{w}d': f'Media móvil de casos ({w} días)' for w in WINDOWS},
+    'incidence_7d': f'Incidencia a 7 días por {PER:,} hab.',
+    'growth_wow': 'Crecimiento semanal (semana contra semana anterior)',
+    'doubling_days': 'Tiempo de duplicación (días)',
+    'positivity_7d': 'Positividad a 7 días (casos / pruebas)',
+}
+
+
+# Sums over the trailing `window` rows and the number of rows summed, from
+# cumulative sums with a leading row of zeros
+def window_sums(cumsum, window):
+    end = np.arange(1, len(cumsum))
+    start = np.maximum(end - window, 0)
+    return cumsum[end] - cumsum[start], end - start
+
+
+def _cumsum(values):
+    return np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+
+
+class Metrics:
+    # cases, tests: arrays of shape (days, regions) over consecutive days;
+    # population: pd.Series by region (incidence is left out without it, or
+    # when none of its regions is one of ours)
+    def __init__(self, dates, regions, cases, tests, population=None):
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.columns = pd.Index([*map(str, regions), TOTAL], name='region')
+        cases = np.column_stack([cases, cases.sum(axis=1)]).astype(np.float64)
+        tests = np.column_stack([tests, tests.sum(axis=1)]).astype(np.float64)
+        cases_cum, tests_cum = _cumsum(cases), _cumsum(tests)
+
+        values = {}
+        # The first days average the days there are
+        for window in WINDOWS:
+            sums, counts = window_sums(cases_cum, window)
+            values[f'cases_{window}d'] = sums / counts[:, None]
+
+        week, counts = window_sums(cases_cum, 7)
+        week = np.where((counts == 7)[:, None], week, np.nan)
+        previous = np.vstack([np.full((7, week.shape[1]), np.nan), week[:-7]])[:len(week)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            growth = np.where(previous > 0, week / previous - 1, np.nan)
+            values['growth_wow'] = growth
+            values['doubling_days'] = np.where(growth > 0, 7 * np.log(2) / np.log1p(growth), np.nan)
+            week_tests, _ = window_sums(tests_cum, 7)
+            values['positivity_7d'] = np.where(week_tests > 0, week / week_tests, np.nan)
+
+        people = np.full(len(self.columns) - 1, np.nan)
+        if population is not None:
+            people = population.reindex(self.columns[:-1]).to_numpy(dtype=np.float64)
+        # Regions without a population, for the app to point out
+        self.missing_population = list(self.columns[:-1][np.isnan(people)])
+        if population is not None and not np.isnan(people).all():
+            people = np.append(people, np.nansum(people) if np.isfinite(people).all() else np.nan)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values['incidence_7d'] = week / people * PER
+
+        self._values = values
+
+    @property
+    def names(self):
+        return [name for name in LABELS if name in self._values]
+
+    # One indicator as a DataFrame of days x regions (plus 'Total')
+    def frame(self, name):
+        return pd.DataFrame(self._values[name], index=self.dates, columns=self.columns, copy=False)
@@ -0,0 +1,78 @@
+# Rendered-figure cache. Charts are stored as encoded PNG/SVG bytes keyed by
+# data version, chart id and chart parameters, in a process-wide LRU bounded
+# by total size. A hit returns the bytes without calling matplotlib at all;
+# a miss draws the chart with the stateless renderer in rendering.py.
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import rendering
+
+# Total size of the cached images, in bytes
+MAX_BYTES = int(os.environ.get("HEALTH_GUIDE_FIGURE_CACHE_MB", "64")) * 1024 * 1024
+
+FORMATS = ('png', 'svg')
+DPI = rendering.DPI
+
+
+class FigureCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+cache = FigureCache()
+
+
+def cache_key(chart_id, version, params=None, fmt='png', dpi=DPI, style='default'):
+    text = repr((chart_id, version, sorted((params or {}).items()), fmt, dpi, style))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Encoded bytes of a chart. draw(**params) builds the matplotlib Figure
+# under `style` (see rendering.styled) and only runs on a cache miss.
+def render(chart_id, version, draw, params=None, fmt='png', dpi=DPI, style='default'):
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}, got {fmt!r}")
+    key = cache_key(chart_id, version, params, fmt, dpi, style)
+    data = cache.get(key)
+    if data is None:
+        data = rendering.render(draw, params, fmt, dpi, style)
+        cache.put(key, data)
+    return data
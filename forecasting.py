@@ -0,0 +1,135 @@
+# Seasonal decomposition and Holt-Winters forecasts for many daily series
+# at once. Every series is a column of one array: the moving average comes
+# from cumulative sums, and the Holt-Winters recursion steps all series and
+# every candidate smoothing parameter together, one day per NumPy step,
+# instead of fitting one model per series in a loop.
+import statistics
+
+import numpy as np
+
+# Seasonal periods offered in the app: the weekly cycle and the two peaks
+# per year of the sample data
+PERIODS = {7: 'Semanal (7 días)', 182: 'Semestral (182 días)'}
+COMPONENTS = ('observed', 'trend', 'seasonal', 'resid')
+LABELS = {'observed': 'Observado', 'trend': 'Tendencia', 'seasonal': 'Estacionalidad', 'resid': 'Residuo'}
+
+# Candidate smoothing parameters (error-correction form): alpha for the
+# level, beta as a fraction of alpha for the trend, gamma for the season
+ALPHAS = (0.05, 0.2, 0.5, 0.8)
+BETA_FRACTIONS = (0.01, 0.1)
+GAMMAS = (0.01, 0.1, 0.3)
+
+
+# Centered moving average of `period` rows (2 x period when even) of an
+# array of shape (days, series); NaN where the window does not fit
+def moving_average(values, period):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    trend = np.full(values.shape, np.nan)
+    if n < period + (period % 2 == 0):
+        return trend
+    cumsum = np.vstack([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    means = (cumsum[period:] - cumsum[:-period]) / period
+    half = period // 2
+    if period % 2:
+        trend[half:n - half] = means
+    else:
+        trend[half:n - half] = (means[:-1] + means[1:]) / 2
+    return trend
+
+
+# Classical additive decomposition of every column: trend from the
+# centered moving average, seasonal profile from the mean detrended value
+# of each phase (centered on zero), residual the rest.
+# Returns {component: array of shape (days, series)}.
+def decompose(values, period=7):
+    values = np.asarray(values, dtype=np.float64)
+    trend = moving_average(values, period)
+    n, width = values.shape
+    rows = -(-n // period) * period
+    padded = np.full((rows, width), np.nan)
+    padded[:n] = values - trend
+    phases = padded.reshape(rows // period, period, width)
+    known = ~np.isnan(phases)
+    counts = known.sum(axis=0)
+    profile = np.where(counts > 0, np.where(known, phases, 0).sum(axis=0) / np.maximum(counts, 1), 0)
+    profile -= profile.mean(axis=0)
+    seasonal = np.tile(profile, (rows // period, 1))[:n]
+    return {'observed': values, 'trend': trend, 'seasonal': seasonal, 'resid': values - trend - seasonal}
+
+
+# Additive Holt-Winters (ETS(A,A,A)) for every column of an array of shape
+# (days, series). All candidate parameters in the grid run side by side and
+# each series keeps the one with the smallest one-step-ahead squared error;
+# update() then carries the chosen models over new days.
+class HoltWinters:
+    def __init__(self, values, period=7):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) < 2 * period:
+            raise ValueError(f"Holt-Winters with period {period} needs at least {2 * period} days, "
+                             f"got {len(values)}")
+        self.period = period
+        grid = np.array([(alpha, alpha * fraction, gamma) for alpha in ALPHAS
+                         for fraction in BETA_FRACTIONS for gamma in GAMMAS if gamma < 1 - alpha])
+        # (candidates, 1) parameters against (candidates, series) states
+        self.alpha, self.beta, self.gamma = (grid[:, [i]] for i in range(3))
+
+        # Level and trend at the end of the first period, season from the
+        # deviations of that period around the trend line
+        first, second = values[:period], values[period:2 * period]
+        trend = (second.mean(axis=0) - first.mean(axis=0)) / period
+        line = first.mean(axis=0) + trend * (np.arange(period)[:, None] - (period - 1) / 2)
+        shape = (len(grid), values.shape[1])
+        self.level = np.broadcast_to(line[-1], shape).copy()
+        self.trend = np.broadcast_to(trend, shape).copy()
+        self.season = np.broadcast_to((first - line)[:, None], (period,) + shape).copy()
+        self.sse = np.zeros(shape)
+        self.days = period
+        self._step(values[period:])
+
+        best = self.sse.argmin(axis=0)
+        columns = np.arange(values.shape[1])
+        self.alpha, self.beta, self.gamma = (param[best, 0] for param in (self.alpha, self.beta, self.gamma))
+        self.level, self.trend, self.sse = (state[best, columns] for state in (self.level, self.trend, self.sse))
+        self.season = self.season[:, best, columns]
+
+    def copy(self):
+        other = HoltWinters.__new__(HoltWinters)
+        other.__dict__.update(self.__dict__)
+        for name in ('level', 'trend', 'season', 'sse'):
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
+    # One recursion step per row, for all series (and candidates) at once
+    def _step(self, values):
+        for row in values:
+            phase = self.days % self.period
+            season = self.season[phase]
+            error = row - (self.level + self.trend + season)
+            self.sse += error ** 2
+            self.level = self.level + self.trend + self.alpha * error
+            self.trend = self.trend + self.beta * error
+            self.season[phase] = season + self.gamma * error
+            self.days += 1
+
+    # Carry the fitted models over the following days, shape (days, series)
+    def update(self, values):
+        self._step(np.asarray(values, dtype=np.float64))
+        return self
+
+    # Variance of the one-step-ahead errors of each series
+    @property
+    def sigma2(self):
+        return self.sse / max(self.days - self.period, 1)
+
+    # Mean forecast and `level` prediction interval for the next `horizon`
+    # days: (mean, low, high), each of shape (horizon, series)
+    def forecast(self, horizon, level=0.95):
+        steps = np.arange(1, horizon + 1)[:, None]
+        mean = self.level + steps * self.trend + self.season[(self.days + steps[:, 0] - 1) % self.period]
+        # h steps ahead: sigma^2 (1 + sum over j < h of (alpha + j beta + gamma [j % period == 0])^2)
+        j = steps[:-1]
+        weights = (self.alpha + j * self.beta + self.gamma * (j % self.period == 0)) ** 2
+        variance = self.sigma2 * (1 + np.vstack([np.zeros((1, len(self.level))), np.cumsum(weights, axis=0)]))
+        spread = statistics.NormalDist().inv_cdf((1 + level) / 2) * np.sqrt(variance)
+        return mean, mean - spread, mean + spread
@@ -0,0 +1,306 @@
+# Streaming ingestion of CSV, Excel and Parquet files. A sample of the first
+# rows decides every column's type and date format; the whole file is then
+# read in chunks with those explicit types and appended to the columnar
+# store, so a multi-GB extract is never held in memory as raw text. Integer
+# columns are then downcast to the smallest type holding their range and
+# the dtype optimizer's before/after memory report is stored with the data,
+# as for every other dataset. Files are keyed by the hash of their bytes:
+# loading the same file again only maps the stored copy.
+import contextlib
+import hashlib
+import itertools
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+import dataset_store
+import dtype_optimizer
+from lazy_imports import lazy
+
+pa = lazy("pyarrow")
+pc = lazy("pyarrow.compute")
+pq = lazy("pyarrow.parquet")
+openpyxl = lazy("openpyxl")
+
+EXTENSIONS = {
+    '.csv': 'csv', '.txt': 'csv',
+    '.xlsx': 'excel', '.xlsm': 'excel',
+    '.parquet': 'parquet', '.pq': 'parquet',
+}
+
+SAMPLE_ROWS = 10_000
+CHUNK_ROWS = 200_000
+HASH_BLOCK = 1 << 20
+# Suffix of the key a file is written under before its integers are downcast
+STAGING_SUFFIX = "-staging"
+
+# Share of sampled values that must parse for a text column to be a date
+DATE_MATCH_RATIO = 0.95
+# Values, spread over the sample, whose guessed formats are tried
+DATE_GUESSES = 20
+
+# Column kinds of a read plan and the Arrow type each one is stored as
+ARROW_TYPES = {
+    'date': lambda: pa.timestamp('ns'),
+    'category': lambda: pa.dictionary(pa.int32(), pa.string()),
+    'int': lambda: pa.int64(),
+    'float': lambda: pa.float64(),
+    'bool': lambda: pa.bool_(),
+    'text': lambda: pa.string(),
+}
+
+# dtype each kind is read with from CSV text
+CSV_DTYPES = {
+    'date': str, 'category': str, 'text': str,
+    'int': 'Int64', 'float': 'float64', 'bool': 'boolean',
+}
+
+
+def kind_of(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f"Tipo de archivo no soportado: {name}")
+    return EXTENSIONS[ext]
+
+
+# Binary handle for a path or an already open file object (left open)
+def _opened(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    source.seek(0)
+    return contextlib.nullcontext(source)
+
+
+def _size(fh):
+    position = fh.tell()
+    size = fh.seek(0, os.SEEK_END)
+    fh.seek(position)
+    return size
+
+
+def file_key(source):
+    digest = hashlib.sha256()
+    with _opened(source) as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return "file-" + digest.hexdigest()[:24]
+
+
+# Chunk readers yield (DataFrame, fraction of the file read so far)
+def _read_csv(fh, plan=None, chunk_rows=CHUNK_ROWS):
+    size = _size(fh) or 1
+    dtype = {name: CSV_DTYPES[kind] for name, (kind, _) in (plan or {}).items()}
+    for chunk in pd.read_csv(fh, dtype=dtype or None, chunksize=chunk_rows):
+        yield chunk, min(fh.tell() / size, 1.0)
+
+
+def _read_excel(fh, plan=None, chunk_rows=CHUNK_ROWS):
+    book = openpyxl.load_workbook(fh, read_only=True, data_only=True)
+    try:
+        sheet = book.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(cell) for cell in next(rows, ())]
+        total = max((sheet.max_row or 1) - 1, 1)
+        done = 0
+        while True:
+            batch = list(itertools.islice(rows, chunk_rows))
+            if not batch:
+                break
+            done += len(batch)
+            yield pd.DataFrame(batch, columns=header), min(done / total, 1.0)
+    finally:
+        book.close()
+
+
+def _read_parquet(fh, plan=None, chunk_rows=CHUNK_ROWS):
+    parquet = pq.ParquetFile(fh)
+    total = max(parquet.metadata.num_rows, 1)
+    done = 0
+    for batch in parquet.iter_batches(batch_size=chunk_rows):
+        done += batch.num_rows
+        yield batch.to_pandas(), done / total
+
+
+READERS = {'csv': _read_csv, 'excel': _read_excel, 'parquet': _read_parquet}
+
+
+# First SAMPLE_ROWS rows. CSV is read with nrows rather than by closing a
+# chunked reader early, which would let pandas close the caller's handle.
+def _sample(kind, fh):
+    if kind == 'csv':
+        return pd.read_csv(fh, nrows=SAMPLE_ROWS)
+    sampler = READERS[kind](fh, chunk_rows=SAMPLE_ROWS)
+    try:
+        sample, _ = next(sampler, (pd.DataFrame(), 1.0))
+    finally:
+        sampler.close()
+    return sample
+
+
+# Date format that parses the largest share of the column, from formats
+# guessed month-first and day-first on a few values ("13/01/2023" only
+# reads day-first). Ties go to the month-first guess, pandas' default.
+def _date_format(col):
+    values = col.dropna().astype(str)
+    if values.empty:
+        return None
+    picks = values.iloc[np.linspace(0, len(values) - 1, min(DATE_GUESSES, len(values))).astype(int)]
+    candidates = []
+    with warnings.catch_warnings():
+        # pandas warns whenever the guess contradicts `dayfirst`
+        warnings.simplefilter('ignore', UserWarning)
+        for dayfirst in (False, True):
+            for value in picks.unique():
+                fmt = guess_datetime_format(value, dayfirst=dayfirst)
+                if fmt is not None and fmt not in candidates:
+                    candidates.append(fmt)
+    best, best_ratio = None, 0.0
+    for fmt in candidates:
+        ratio = pd.to_datetime(values, format=fmt, errors='coerce').notna().mean()
+        if ratio > best_ratio:
+            best, best_ratio = fmt, ratio
+    return best if best_ratio >= DATE_MATCH_RATIO else None
+
+
+# Read plan inferred from a sample: column -> (kind, date format or None).
+# Text columns the dtype optimizer would make categorical are stored as
+# dictionary columns.
+def infer_schema(sample):
+    compact, _ = dtype_optimizer.optimize(sample)
+    plan = {}
+    for name, col in sample.items():
+        if pd.api.types.is_datetime64_any_dtype(col):
+            plan[name] = ('date', None)
+        elif pd.api.types.is_bool_dtype(col):
+            plan[name] = ('bool', None)
+        elif pd.api.types.is_integer_dtype(col):
+            plan[name] = ('int', None)
+        elif pd.api.types.is_float_dtype(col):
+            plan[name] = ('float', None)
+        else:
+            fmt = _date_format(col)
+            if fmt is not None:
+                plan[name] = ('date', fmt)
+            elif isinstance(compact[name].dtype, pd.CategoricalDtype):
+                plan[name] = ('category', None)
+            else:
+                plan[name] = ('text', None)
+    return plan
+
+
+def arrow_schema(plan):
+    return pa.schema([(name, ARROW_TYPES[kind]()) for name, (kind, _) in plan.items()])
+
+
+def _as_text(col):
+    return col.where(col.isna(), col.astype(str))
+
+
+# Apply the plan to one chunk. categories holds every category seen so far
+# per column; new ones are appended so earlier codes never move.
+def _convert(chunk, plan, categories):
+    out = {}
+    for name, (kind, fmt) in plan.items():
+        col = chunk[name]
+        if kind == 'date':
+            col = pd.to_datetime(col, format=fmt, errors='coerce')
+        elif kind == 'category':
+            col = _as_text(col)
+            known = categories.get(name, pd.Index([], dtype=object))
+            fresh = pd.Index(col.dropna().unique()).difference(known, sort=False)
+            known = categories[name] = known.append(fresh)
+            col = pd.Categorical(col, categories=known)
+        elif kind == 'text':
+            col = _as_text(col)
+        out[name] = col
+    return pd.DataFrame(out)
+
+
+# Smallest signed integer type holding every value of an Arrow column
+def _int_type(column):
+    bounds = pc.min_max(column).as_py()
+    low, high = bounds['min'] or 0, bounds['max'] or 0
+    for width in (8, 16, 32):
+        info = np.iinfo(f'int{width}')
+        if info.min <= low and high <= info.max:
+            return getattr(pa, f'int{width}')()
+    return pa.int64()
+
+
+# Per-column dtypes and deep memory usage summed over chunks
+class _Usage:
+    def __init__(self):
+        self.dtypes = pd.Series(dtype=object)
+        self.bytes = pd.Series(dtype=np.int64)
+
+    def add(self, frame):
+        usage = frame.memory_usage(deep=True, index=False)
+        if self.dtypes.empty:
+            self.dtypes, self.bytes = frame.dtypes.astype(str), usage
+        else:
+            self.bytes = self.bytes + usage
+
+
+# Copy the staged table to `key` with its integer columns downcast and the
+# memory report (`read`: usage of the chunks as read, against the stored
+# columns as pandas holds them) in the schema metadata
+def _compact(staging, key, plan, read):
+    table = dataset_store.open_table(staging)
+    types = {name: _int_type(table.column(name)) for name, (kind, _) in plan.items() if kind == 'int'}
+    schema = pa.schema([pa.field(field.name, types.get(field.name, field.type)) for field in table.schema])
+
+    def batches():
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            yield pa.Table.from_batches([batch]).cast(schema)
+
+    stored = _Usage()
+    for batch in batches():
+        stored.add(batch.to_pandas())
+    report = dtype_optimizer.usage_report(read.dtypes, read.bytes, stored.dtypes, stored.bytes)
+    schema = schema.with_metadata({
+        **(schema.metadata or {}),
+        b"dataset_key": key.encode(),
+        b"memory_report": dtype_optimizer.dumps_report(report).encode(),
+    })
+    with dataset_store.writer(key, schema) as writer:
+        for batch in batches():
+            writer.write_table(batch.replace_schema_metadata(schema.metadata))
+
+
+# Ingest a file (a path or an uploaded file object) into the columnar store
+# and return its key. progress(fraction) is called after every chunk.
+def ingest(source, name=None, progress=None):
+    name = name or getattr(source, 'name', None) or os.fspath(source)
+    kind = kind_of(name)
+    read = READERS[kind]
+    key = file_key(source)
+    if dataset_store.exists(key):
+        if progress:
+            progress(1.0)
+        return key
+
+    staging = key + STAGING_SUFFIX
+    with _opened(source) as fh:
+        plan = infer_schema(_sample(kind, fh))
+        schema = arrow_schema(plan)
+        fh.seek(0)
+
+        categories = {}
+        usage = _Usage()
+        with dataset_store.writer(staging, schema) as writer:
+            for chunk, done in read(fh, plan):
+                usage.add(chunk)
+                table = pa.Table.from_pandas(
+                    _convert(chunk, plan, categories), schema=schema, preserve_index=False
+                )
+                writer.write_table(table.replace_schema_metadata(schema.metadata))
+                if progress:
+                    progress(done)
+    try:
+        _compact(staging, key, plan, usage)
+    finally:
+        dataset_store.remove(staging)
+    return key
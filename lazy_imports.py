@@ -0,0 +1,66 @@
+# Deferred imports for the heavy plotting/statistics libraries. Pages declare
+# what they use and each module is imported the first time a page needs it.
+import functools
+import importlib
+import os
+import threading
+import time
+
+# Seconds spent importing each module, in load order
+IMPORT_TIMES = {}
+
+# Set to 1 to import everything up front (the old behaviour), for benchmarks
+EAGER = os.environ.get("HEALTH_GUIDE_EAGER_IMPORTS") == "1"
+
+_lock = threading.Lock()
+
+
+# Module proxy that imports the real module on first attribute access
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        module = self._module
+        if module is None:
+            with _lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    self._module = importlib.import_module(self._name)
+                    IMPORT_TIMES[self._name] = time.perf_counter() - start
+                module = self._module
+        return module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy(name):
+    module = LazyModule(name)
+    if EAGER:
+        module.load()
+    return module
+
+
+# Decorator for page functions: records the heavy modules a page uses and
+# imports them when the page is first rendered
+def requires(*modules):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for module in modules:
+                module.load()
+            return func(*args, **kwargs)
+
+        wrapper.dependencies = tuple(module._name for module in modules)
+        return wrapper
+    return decorator
@@ -0,0 +1,359 @@
+# Append mode for a dataset whose records keep arriving. New day or patient
+# records update the aggregation cube, the national daily totals behind the
+# rolling means, the histograms and the running descriptive statistics,
+# without touching the history again. Every append swaps in a new state in
+# one step and bumps the version; version_for() tells a chart whether the
+# data in its date range actually changed.
+import threading
+
+import numpy as np
+import pandas as pd
+
+import binning
+import epi_metrics
+import forecasting
+import group_stats
+import kde
+import olap
+import surveillance
+import time_index
+
+ROLLING_WINDOWS = (7, 14, 28)
+# Each combination of these is one series for outbreak detection
+SURVEILLANCE_DIMS = ('region', 'age_group')
+
+
+# Count, sum, mean, variance (Welford / Chan et al. pairwise merge), min and
+# max of every measure, updated one batch of records at a time
+class RunningStats:
+    def __init__(self, measures=olap.MEASURES):
+        self.measures = tuple(measures)
+        size = len(self.measures)
+        self.count = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+
+    def copy(self):
+        other = RunningStats(self.measures)
+        for name in ('count', 'mean', 'm2', 'min', 'max'):
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
+    def update(self, frame):
+        for i, name in enumerate(self.measures):
+            if name not in frame:
+                continue
+            values = frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if len(values) == 0:
+                continue
+            n_b, mean_b = len(values), values.mean()
+            m2_b = ((values - mean_b) ** 2).sum()
+            n_a = self.count[i]
+            n = n_a + n_b
+            delta = mean_b - self.mean[i]
+            self.mean[i] += delta * n_b / n
+            self.m2[i] += m2_b + delta ** 2 * n_a * n_b / n
+            self.count[i] = n
+            self.min[i] = min(self.min[i], values.min())
+            self.max[i] = max(self.max[i], values.max())
+        return self
+
+    # Same rows as DataFrame.describe() except the quantiles, which cannot
+    # be maintained exactly in a single pass
+    def describe(self):
+        count = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2 / (count - 1))
+        empty = count == 0
+        return pd.DataFrame({
+            'count': count,
+            'sum': self.mean * count,
+            'mean': np.where(empty, np.nan, self.mean),
+            'std': np.where(count > 1, std, np.nan),
+            'min': np.where(empty, np.nan, self.min),
+            'max': np.where(empty, np.nan, self.max),
+        }, index=list(self.measures)).T
+
+
+# Everything served for one version of the data: the cube, totals and
+# statistics plus the caches derived from them. append() builds a new
+# state and swaps it in with one assignment, so a reader that takes the
+# state once sees a single consistent version throughout.
+class _State:
+    def __init__(self, cube, stats, daily, cumsum, version=0, revisions=(), appended=()):
+        self.cube = cube
+        self.stats = stats
+        self.daily = daily
+        self.cumsum = cumsum
+        self.version = version
+        # (version, first day it changed), one entry per append
+        self.revisions = tuple(revisions)
+        # Record frames appended since the dataset was loaded
+        self.appended = tuple(appended)
+        self.rolling = {}
+        self.series = None
+        self.metrics = {}
+        # (surveillance.Detector after the last day, {method: alerts})
+        self.surveillance = None
+        # Seasonal period -> forecasting.HoltWinters fitted up to the last day
+        self.forecasters = {}
+        self.decompositions = {}
+        # (measure, cube grouping) -> binning.Histogram of the grouped cells
+        self.histograms = {}
+        self.densities = {}
+        self.intervals = {}
+
+
+class LiveDataset:
+    def __init__(self, cube, stats):
+        daily = cube.daily_totals()
+        cumsum = np.vstack([np.zeros((1, len(olap.MEASURES))), np.cumsum(daily, axis=0)])
+        self._state = _State(cube, stats, daily, cumsum)
+        self._lock = threading.Lock()
+
+    # Build the cube and the statistics from a dataset read in pieces;
+    # frames(columns) returns a fresh iterable of DataFrames
+    @classmethod
+    def from_frames(cls, frames):
+        stats = RunningStats()
+        for frame in frames(list(olap.MEASURES)):
+            stats.update(frame)
+        return cls(olap.build(frames), stats)
+
+    # A LiveDataset over the same data whose appends stay its own; the
+    # current state is shared, never modified by either side
+    def fork(self):
+        other = LiveDataset.__new__(LiveDataset)
+        other._state = self._state
+        other._lock = threading.Lock()
+        return other
+
+    @property
+    def cube(self):
+        return self._state.cube
+
+    @property
+    def stats(self):
+        return self._state.stats
+
+    @property
+    def version(self):
+        return self._state.version
+
+    # Records appended since the dataset was loaded, one frame per append,
+    # for row-level structures built from the stored dataset
+    @property
+    def appended(self):
+        return self._state.appended
+
+    # Add new records; returns the new version
+    def append(self, frame):
+        if len(frame) == 0:
+            return self.version
+        with self._lock:
+            old = self._state
+            old_start = old.cube.dates[0] if len(old.cube.dates) else None
+            cube = old.cube.append(frame)
+            first = frame['date'].min().normalize()
+            # Days between the old last day and `first` are zero-filled by
+            # the cube and recomputed along with the new ones
+            lo = min(cube.dates.searchsorted(first), len(old.daily))
+
+            if old_start is not None and cube.dates[0] != old_start:
+                # Records before the old first day shift every index
+                daily = cube.daily_totals()
+                lo = 0
+            else:
+                daily = np.vstack([old.daily[:lo], cube.daily_totals(lo)])
+            cumsum = np.vstack([
+                old.cumsum[:lo + 1],
+                old.cumsum[lo] + np.cumsum(daily[lo:], axis=0)
+            ])
+            version = old.version + 1
+            state = _State(cube, old.stats.copy().update(frame), daily, cumsum,
+                           version, old.revisions + ((version, cube.dates[lo]),), old.appended + (frame,))
+
+            # Cells of days after the last one are new values of every
+            # histogram grouped by date; anything else is recounted on use
+            new_days_only = len(old.cube.dates) > 0 and first > old.cube.dates[-1]
+            if new_days_only:
+                new_days = {'date': (first, cube.dates[-1])}
+                for (measure, by), hist in old.histograms.items():
+                    if 'date' in by:
+                        cells = cube.query(by=list(by), measures=[measure], filters=new_days)
+                        state.histograms[(measure, by)] = hist.update(cells[measure].values)
+
+            # Detectors carry on from their state over the new days as long
+            # as no series was added; otherwise they rerun on first use
+            if (old.surveillance is not None and new_days_only
+                    and all(len(cube.labels[dim]) == len(old.cube.labels[dim]) for dim in SURVEILLANCE_DIMS)):
+                detector, alerts = old.surveillance
+                detector = detector.copy()
+                new = detector.run(_series_counts(cube, lo=len(old.cube.dates)))
+                state.surveillance = (detector, {method: np.vstack([alerts[method], new[method]])
+                                                 for method in alerts})
+
+            # Same for the forecasting models, as long as no region was added
+            if old.forecasters and new_days_only and len(cube.labels['region']) == len(old.cube.labels['region']):
+                new_cases = _region_cases(cube, lo=len(old.cube.dates))
+                state.forecasters = {period: model.copy().update(new_cases)
+                                     for period, model in old.forecasters.items()}
+
+            self._state = state
+            return version
+
+    # Latest version that changed any day up to the end of date_range
+    # (any day at all when no range is given): a cache key for the range
+    def version_for(self, date_range=None):
+        state = self._state
+        if not date_range:
+            return state.version
+        end = pd.Timestamp(date_range[1])
+        version = 0
+        for revision, first in state.revisions:
+            if first <= end:
+                version = revision
+        return version
+
+    # National daily totals of every measure
+    def daily_totals(self):
+        state = self._state
+        return pd.DataFrame(state.daily, index=state.cube.dates, columns=list(olap.MEASURES))
+
+    # National daily totals with weekly and monthly resamples, sliced by
+    # date range with binary search (see time_index.TimeSeries)
+    def time_series(self):
+        state = self._state
+        if state.series is None:
+            state.series = time_index.TimeSeries(state.cube.dates, state.daily, olap.MEASURES)
+        return state.series
+
+    # Rolling indicators per region and in total (see epi_metrics.Metrics);
+    # population: pd.Series of inhabitants by region, for incidence
+    def metrics(self, population=None):
+        state = self._state
+        key = None if population is None else tuple(population.items())
+        cached = state.metrics.get(key)
+        if cached is None:
+            daily = state.cube.by_day('region', ('cases', 'tests'))
+            cached = epi_metrics.Metrics(state.cube.dates, state.cube.labels['region'],
+                                         daily[..., 0], daily[..., 1], population)
+            state.metrics[key] = cached
+        return cached
+
+    # Outbreak alerts on the daily cases of every region x age group series
+    # and of the national total: (series labels, {method: bool array of
+    # days x series}, {method: bool array of days})
+    def alerts(self):
+        state = self._state
+        if state.surveillance is None:
+            counts = _series_counts(state.cube)
+            detector = surveillance.Detector(counts.shape[1])
+            state.surveillance = (detector, detector.run(counts))
+        labels = pd.MultiIndex.from_product([state.cube.labels[dim] for dim in SURVEILLANCE_DIMS],
+                                            names=list(SURVEILLANCE_DIMS))
+        alerts = state.surveillance[1]
+        return (labels, {method: flags[:, :-1] for method, flags in alerts.items()},
+                {method: flags[:, -1] for method, flags in alerts.items()})
+
+    # Trend, seasonal and residual components of the daily cases per region
+    # and in total (see forecasting.decompose): {component: DataFrame of
+    # days x regions}
+    def decomposition(self, period=7):
+        state = self._state
+        cached = state.decompositions.get(period)
+        if cached is None:
+            columns = _region_columns(state.cube)
+            cached = {name: pd.DataFrame(values, index=state.cube.dates, columns=columns, copy=False)
+                      for name, values in forecasting.decompose(_region_cases(state.cube), period).items()}
+            state.decompositions[period] = cached
+        return cached
+
+    # Holt-Winters forecast of the daily cases per region and in total for
+    # the `horizon` days after the last one: (mean, low, high) DataFrames.
+    # The models are fitted once and carried forward as days are appended.
+    def forecast(self, horizon, period=7, level=0.95):
+        state = self._state
+        model = state.forecasters.get(period)
+        if model is None:
+            model = forecasting.HoltWinters(_region_cases(state.cube), period)
+            state.forecasters[period] = model
+        dates = pd.date_range(state.cube.dates[-1] + pd.Timedelta(days=1), periods=horizon, freq='D', name='date')
+        columns = _region_columns(state.cube)
+        return tuple(pd.DataFrame(values, index=dates, columns=columns)
+                     for values in model.forecast(horizon, level))
+
+    # Trailing mean over `window` days of the national daily totals, from
+    # the running cumulative sums (the first days average what exists)
+    def rolling_mean(self, window, measure='cases'):
+        state = self._state
+        cached = state.rolling.get((window, measure))
+        if cached is None:
+            i = olap.MEASURES.index(measure)
+            cumsum = state.cumsum[:, i]
+            end = np.arange(1, len(cumsum))
+            start = np.maximum(end - window, 0)
+            cached = pd.Series((cumsum[end] - cumsum[start]) / (end - start),
+                               index=state.cube.dates, name=f"{measure}_{window}d")
+            state.rolling[(window, measure)] = cached
+        return cached
+
+    # Histogram of a measure over the cube cells grouped by `by` (one value
+    # per region and day by default); rebin() it for any number of bins
+    def histogram(self, measure='cases', by=('date', 'region')):
+        return self._histogram(self._state, measure, by)
+
+    @staticmethod
+    def _histogram(state, measure, by):
+        key = (measure, tuple(by))
+        cached = state.histograms.get(key)
+        if cached is None:
+            cells = state.cube.query(by=list(by), measures=[measure])
+            cached = binning.Histogram.from_values(cells[measure].values)
+            state.histograms[key] = cached
+        return cached
+
+    # Kernel density of the same cells at `size` points from their minimum
+    # to their maximum, as (points, density); see kde.from_histogram
+    def density(self, measure='cases', by=('date', 'region'), size=1000):
+        state = self._state
+        key = (measure, tuple(by), size)
+        cached = state.densities.get(key)
+        if cached is None:
+            cached = kde.from_histogram(self._histogram(state, measure, by), size=size)
+            state.densities[key] = cached
+        return cached
+
+    # Mean of a measure per `group` over the cube cells grouped by `by`,
+    # with confidence intervals (see group_stats.mean_ci)
+    def mean_ci(self, measure='cases', group='region', by=('date', 'region'), method='t', level=0.95):
+        state = self._state
+        key = (measure, group, tuple(by), method, level)
+        cached = state.intervals.get(key)
+        if cached is None:
+            cells = state.cube.query(by=list(by), measures=[measure])
+            cached = group_stats.mean_ci(cells[measure], cells[group], level=level, method=method)
+            state.intervals[key] = cached
+        return cached
+
+
+# Daily cases of the days lo: as an array of shape (days, series + 1), one
+# series per SURVEILLANCE_DIMS combination plus the national total
+def _series_counts(cube, lo=0):
+    counts = cube.by_day(SURVEILLANCE_DIMS, ('cases',), lo=lo)[..., 0]
+    counts = counts.reshape(len(counts), -1)
+    return np.column_stack([counts, counts.sum(axis=1)])
+
+
+# Daily cases of the days lo: per region plus the national total, shape
+# (days, regions + 1)
+def _region_cases(cube, lo=0):
+    cases = cube.by_day('region', ('cases',), lo=lo)[..., 0]
+    return np.column_stack([cases, cases.sum(axis=1)])
+
+
+def _region_columns(cube):
+    return pd.Index([*map(str, cube.labels['region']), epi_metrics.TOTAL], name='region')
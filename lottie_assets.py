@@ -0,0 +1,153 @@
+# Lottie animation assets: parallel fetch with timeouts, a content-addressed
+# disk cache and a bundled offline copy for every animation used by the app.
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "lottie")
+BUNDLE_DIR = os.path.join(BASE_DIR, "assets", "lottie")
+
+# (connect, read) timeout in seconds for each request
+FETCH_TIMEOUT = (3.05, 6)
+# Longest a page waits on a download before falling back to the bundle
+RENDER_WAIT = 1.5
+# Seconds before a failed URL is tried again
+RETRY_AFTER = 120
+
+# Name -> remote URL of every animation shown in the guide
+ANIMATIONS = {
+    "coding": "https://assets2.lottiefiles.com/packages/lf20_fcfjwiyb.json",
+    "health": "https://assets10.lottiefiles.com/packages/lf20_5njp3vgg.json",
+    "chart": "https://assets9.lottiefiles.com/packages/lf20_xlkxtmul.json",
+}
+
+_executor = ThreadPoolExecutor(max_workers=len(ANIMATIONS), thread_name_prefix="lottie")
+_pending = {}
+_failed_at = {}
+_resolved = {}
+_lock = threading.Lock()
+
+
+# Path of the ref file that points a URL at its content digest
+def _ref_path(url):
+    return os.path.join(CACHE_DIR, "refs", hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+
+# Path of a stored animation body, addressed by the SHA-256 of its bytes
+def _object_path(digest):
+    return os.path.join(CACHE_DIR, "objects", digest[:2], digest + ".json")
+
+
+# Write bytes through a temporary file so readers never see partial content
+def _atomic_write(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _read_cached(url):
+    try:
+        with open(_ref_path(url), encoding="ascii") as fh:
+            digest = fh.read().strip()
+        with open(_object_path(digest), "rb") as fh:
+            payload = fh.read()
+    except OSError:
+        return None
+    # Discard corrupted objects instead of serving them
+    if hashlib.sha256(payload).hexdigest() != digest:
+        return None
+    return json.loads(payload)
+
+
+def _store_cached(url, payload):
+    digest = hashlib.sha256(payload).hexdigest()
+    object_path = _object_path(digest)
+    if not os.path.exists(object_path):
+        _atomic_write(object_path, payload)
+    _atomic_write(_ref_path(url), digest.encode("ascii"))
+
+
+def _read_bundled(name):
+    try:
+        with open(os.path.join(BUNDLE_DIR, name + ".json"), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+# Download one animation and persist it; returns None on any network error
+def _fetch(url):
+    try:
+        r = requests.get(url, timeout=FETCH_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if r.status_code != 200:
+        return None
+    try:
+        animation = json.loads(r.content)
+    except ValueError:
+        return None
+    try:
+        _store_cached(url, r.content)
+    except OSError:
+        pass  # A read-only disk only costs us the cache
+    return animation
+
+
+def _submit(name):
+    with _lock:
+        future = _pending.get(name)
+        if future is None:
+            if time.monotonic() - _failed_at.get(name, -RETRY_AFTER) < RETRY_AFTER:
+                return None
+            future = _executor.submit(_fetch, ANIMATIONS[name])
+            _pending[name] = future
+        return future
+
+
+# Start background downloads for every animation missing from the disk cache
+def prefetch(names=None):
+    for name in names or ANIMATIONS:
+        if _read_cached(ANIMATIONS[name]) is None:
+            _submit(name)
+
+
+# Resolve an animation: memory, disk cache, network (bounded wait), bundle.
+# Bundled copies are not memoized so a later rerun can still pick up the
+# real animation once the network comes back.
+def get_animation(name, wait=RENDER_WAIT):
+    animation = _resolved.get(name)
+    if animation is not None:
+        return animation
+
+    url = ANIMATIONS[name]
+    animation = _read_cached(url)
+    if animation is not None:
+        _resolved[name] = animation
+        return animation
+
+    future = _submit(name)
+    if future is not None:
+        try:
+            animation = future.result(timeout=wait)
+        except FutureTimeout:
+            pass
+        if future.done():
+            with _lock:
+                if _pending.get(name) is future:
+                    del _pending[name]
+                    if future.result() is None:
+                        _failed_at[name] = time.monotonic()
+
+    if animation is None:
+        return _read_bundled(name)
+    _resolved[name] = animation
+    return animation
@@ -0,0 +1,45 @@
+# Per-page memory growth across reruns, measured with tracemalloc. Enabled
+# with HEALTH_GUIDE_TRACE_MEMORY=1 (tracing slows every allocation down).
+import contextlib
+import gc
+import os
+import threading
+import tracemalloc
+
+ENABLED = os.environ.get("HEALTH_GUIDE_TRACE_MEMORY") == "1"
+
+# Runs ignored before measuring growth: caches fill on the first renders
+WARMUP_RUNS = 2
+
+# Page slug -> traced bytes after each run of that page
+SAMPLES = {}
+
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def page_run(slug):
+    if not ENABLED:
+        yield
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        with _lock:
+            SAMPLES.setdefault(slug, []).append(current)
+
+
+# Average bytes a page keeps per run after the warm-up runs
+def growth(slug, warmup=WARMUP_RUNS):
+    samples = SAMPLES.get(slug, [])[warmup:]
+    if len(samples) < 2:
+        return 0.0
+    return (samples[-1] - samples[0]) / (len(samples) - 1)
+
+
+def report(warmup=WARMUP_RUNS):
+    return {slug: growth(slug, warmup) for slug in SAMPLES}
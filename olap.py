@@ -0,0 +1,243 @@
+# Materialized aggregation cube over date x region x age_group x gender.
+# Every measure (plus the record count) is summed into a dense NumPy array
+# once per dataset version with a single bincount pass; summary charts,
+# monthly roll-ups and contingency tables are then answered by summing
+# cube cells, never by scanning the rows again.
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ('region', 'age_group', 'gender')
+MEASURES = ('cases', 'recovered', 'tests', 'hospitalized')
+# Number of records in a cell, stored as one more measure
+ROWS = 'rows'
+
+GRAINS = ('date', 'week', 'month')
+_PERIODS = {'week': 'W-SUN', 'month': 'M'}
+
+FUNCS = ('sum', 'mean')
+
+
+# Daily cells summed into weeks or months, labelled with the first day of
+# each period
+def _reduce(dates, cells, grain):
+    if len(dates) == 0:
+        return dates, cells
+    periods = dates.to_period(_PERIODS[grain])
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return periods[starts].to_timestamp(how='start'), np.add.reduceat(cells, starts, axis=0)
+
+
+class Cube:
+    # cells: array of shape (days, regions, age groups, genders, measures);
+    # integer: measures whose sums are returned as integers;
+    # periods: week/month (labels, cells) already reduced from cells
+    def __init__(self, dates, labels, cells, integer=(), periods=None):
+        self.dates = dates
+        self.labels = labels
+        self.measures = MEASURES + (ROWS,)
+        self.integer = frozenset(integer) | {ROWS}
+        self._grains = {'date': (dates, cells)}
+        for grain in _PERIODS:
+            self._grains[grain] = (periods or {}).get(grain) or _reduce(dates, cells, grain)
+
+    @property
+    def nbytes(self):
+        return sum(cells.nbytes for _, cells in self._grains.values())
+
+    # Time labels and cells for a grain, limited to a date range. Ranges are
+    # cut from the daily cells and re-reduced, which is still O(cells).
+    def _time_block(self, grain, date_range):
+        if not date_range:
+            return self._grains[grain]
+        start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+        lo = self.dates.searchsorted(start, side='left')
+        hi = self.dates.searchsorted(end, side='right')
+        dates, cells = self.dates[lo:hi], self._grains['date'][1][lo:hi]
+        if grain == 'date':
+            return dates, cells
+        return _reduce(dates, cells, grain)
+
+    # Sum (or mean) of measures grouped by any dimensions and at most one
+    # time grain. Fewer dimensions in `by` rolls up, more drills down.
+    # filters: {'region': [...], 'age_group': [...], 'gender': [...],
+    #           'date': (start, end)}
+    # Combinations without records are left out, like groupby(observed=True).
+    def query(self, by=(), measures=MEASURES, filters=None, func='sum'):
+        if func not in FUNCS:
+            raise ValueError(f"func must be one of {FUNCS}, got {func!r}")
+        filters = filters or {}
+        grains = [name for name in by if name in GRAINS]
+        if len(grains) > 1:
+            raise ValueError(f"Only one time grain can be grouped at once, got {grains}")
+        unknown = [name for name in by if name not in GRAINS and name not in DIMENSIONS]
+        unknown += [name for name in measures if name not in self.measures]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}")
+
+        grain = grains[0] if grains else 'date'
+        time_labels, cells = self._time_block(grain, filters.get('date'))
+
+        axis_labels = [time_labels]
+        for axis, dim in enumerate(DIMENSIONS, start=1):
+            labels = self.labels[dim]
+            values = filters.get(dim)
+            if values:
+                keep = labels.get_indexer(list(values))
+                keep = keep[keep >= 0]
+                cells = np.take(cells, keep, axis=axis)
+                labels = labels[keep]
+            axis_labels.append(labels)
+
+        names = (grain,) + DIMENSIONS
+        kept = [axis for axis, name in enumerate(names) if name in by]
+        summed = tuple(axis for axis in range(len(names)) if axis not in kept)
+        cells = cells.sum(axis=summed)
+
+        # Put the axes in the order they were asked for
+        order = sorted(range(len(kept)), key=lambda i: list(by).index(names[kept[i]]))
+        cells = np.transpose(cells, order + [len(kept)])
+        out_names = [names[kept[i]] for i in order]
+        out_labels = [axis_labels[kept[i]] for i in order]
+
+        flat = cells.reshape(-1, len(self.measures))
+        counts = flat[:, -1]
+        present = counts > 0
+        values = flat[:, [self.measures.index(name) for name in measures]]
+        if func == 'mean':
+            values = values / np.where(present, counts, 1)[:, None]
+        result = pd.DataFrame(values[present], columns=list(measures))
+        if func == 'sum':
+            result = result.astype({name: np.int64 for name in measures if name in self.integer})
+        if out_names:
+            index = pd.MultiIndex.from_product(out_labels, names=out_names)[present]
+            for level, name in enumerate(out_names):
+                result.insert(level, name, index.get_level_values(level))
+        return result
+
+    # National daily totals of every measure for the days lo:hi, as an
+    # array of shape (days, measures)
+    def daily_totals(self, lo=0, hi=None):
+        return self._grains['date'][1][lo:hi, ..., :len(MEASURES)].sum(axis=(1, 2, 3))
+
+    # Daily sums of measures per value of one dimension (or per combination
+    # of several), over every day of the cube, empty days included: array of
+    # shape (days, values of each dimension..., measures), for the days lo:hi
+    def by_day(self, dim, measures=MEASURES, lo=0, hi=None):
+        dims = (dim,) if isinstance(dim, str) else tuple(dim)
+        kept = [1 + DIMENSIONS.index(name) for name in dims]
+        summed = tuple(axis for axis in range(1, len(DIMENSIONS) + 1) if axis not in kept)
+        cells = self._grains['date'][1][lo:hi].sum(axis=summed)
+        cells = np.moveaxis(cells, range(1, len(kept) + 1), [kept.index(axis) + 1 for axis in sorted(kept)])
+        return cells[..., [self.measures.index(name) for name in measures]]
+
+    # New cube with the records of `frame` added. Days outside the current
+    # range and unseen dimension values extend the cube; only the days in
+    # the frame and the weeks/months containing them are recomputed, the
+    # existing cells are copied as they are. The cube itself is unchanged,
+    # so readers holding it never see a half-applied update.
+    def append(self, frame):
+        frame = frame[frame['date'].notna()]
+        if len(frame) == 0:
+            return self
+        labels = {dim: _extend_labels(self.labels[dim], frame[dim]) for dim in DIMENSIONS}
+        first, last = frame['date'].min().normalize(), frame['date'].max().normalize()
+        if len(self.dates):
+            first_day, last_day = min(first, self.dates[0]), max(last, self.dates[-1])
+        else:
+            first_day, last_day = first, last
+        dates = pd.date_range(first_day, last_day, freq='D')
+
+        old = self._grains['date'][1]
+        before = dates.searchsorted(self.dates[0]) if len(self.dates) else 0
+        padding = [(before, len(dates) - before - len(self.dates))]
+        padding += [(0, len(labels[dim]) - len(self.labels[dim])) for dim in DIMENSIONS]
+        cells = np.pad(old, padding + [(0, 0)])
+
+        lo, hi = dates.searchsorted(first), dates.searchsorted(last, side='right')
+        block, integer = _accumulate([frame], dates[lo:hi], labels)
+        cells[lo:hi] += block
+
+        # Periods before the first touched one keep their reduced cells
+        periods = {}
+        if before == 0 and cells.shape[1:] == old.shape[1:]:
+            for grain in _PERIODS:
+                period_start = first.to_period(_PERIODS[grain]).start_time
+                old_labels, old_cells = self._grains[grain]
+                kept = old_labels.searchsorted(period_start)
+                tail = dates.searchsorted(period_start)
+                tail_labels, tail_cells = _reduce(dates[tail:], cells[tail:], grain)
+                periods[grain] = (old_labels[:kept].append(tail_labels),
+                                  np.concatenate([old_cells[:kept], tail_cells]))
+        return Cube(dates, labels, cells, (self.integer - {ROWS}) & integer, periods)
+
+    # Contingency table of one measure (record counts by default)
+    def crosstab(self, row, column, measure=ROWS, filters=None):
+        table = self.query(by=[row, column], measures=[measure], filters=filters)
+        return table.pivot(index=row, columns=column, values=measure).fillna(0)
+
+
+def _codes(col, labels):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        mapping = labels.get_indexer(col.cat.categories)
+        codes = np.asarray(col.cat.codes)
+        return np.where(codes >= 0, mapping[codes], -1)
+    return labels.get_indexer(col)
+
+
+# Dimension labels with the values of `col` not seen yet appended
+def _extend_labels(labels, col):
+    seen = col.cat.categories if isinstance(col.dtype, pd.CategoricalDtype) else col.dropna().unique()
+    return labels.append(pd.Index(seen).difference(labels, sort=False))
+
+
+# Sum the records of `frames` into cells over the given consecutive dates.
+# Returns the cells and the set of measures that only held integers.
+def _accumulate(frames, dates, labels):
+    shape = (len(dates),) + tuple(len(labels[dim]) for dim in DIMENSIONS)
+    size = int(np.prod(shape))
+    cells = np.zeros((len(MEASURES) + 1, size))
+    integer = set(MEASURES)
+
+    if size:
+        origin = dates[0].to_datetime64().astype('datetime64[D]')
+        for frame in frames:
+            day = (frame['date'].values.astype('datetime64[D]') - origin).astype(np.int64)
+            valid = frame['date'].notna().values & (day >= 0) & (day < len(dates))
+            flat = day
+            for dim in DIMENSIONS:
+                codes = _codes(frame[dim], labels[dim])
+                valid &= codes >= 0
+                flat = flat * len(labels[dim]) + codes
+            flat = flat[valid]
+            for i, name in enumerate(MEASURES):
+                if name in frame:
+                    if not pd.api.types.is_integer_dtype(frame[name]):
+                        integer.discard(name)
+                    weights = frame[name].to_numpy(dtype=np.float64, na_value=0)[valid]
+                    cells[i] += np.bincount(flat, weights=weights, minlength=size)
+            cells[-1] += np.bincount(flat, minlength=size)
+
+    return np.moveaxis(cells, 0, -1).reshape(shape + (len(MEASURES) + 1,)), integer
+
+
+# Build the cube from a dataset read in pieces: frames(columns) must return
+# a fresh iterable of DataFrames holding those columns. The first pass finds
+# the date range and dimension labels, the second sums every measure.
+def build(frames):
+    start = end = None
+    labels = {dim: pd.Index([]) for dim in DIMENSIONS}
+    for frame in frames(['date', *DIMENSIONS]):
+        if len(frame) == 0:
+            continue
+        first, last = frame['date'].min(), frame['date'].max()
+        start = first if start is None else min(start, first)
+        end = last if end is None else max(end, last)
+        for dim in DIMENSIONS:
+            labels[dim] = _extend_labels(labels[dim], frame[dim])
+
+    if start is None:
+        dates = pd.DatetimeIndex([])
+    else:
+        dates = pd.date_range(start.normalize(), end.normalize(), freq='D')
+    cells, integer = _accumulate(frames(['date', *DIMENSIONS, *MEASURES]), dates, labels)
+    return Cube(dates, labels, cells, integer)
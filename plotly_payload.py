@@ -0,0 +1,164 @@
+# Plotly figures sized for the websocket. optimize() switches scatter
+# traces to WebGL (Scattergl) when the figure holds many points, thins line
+# traces longer than the chart is wide to the min/max of each pixel column
+# (downsample.minmax, which draws the same line) and re-types every data
+# array: integers take the smallest integer type that holds them, floats
+# are rounded to the precision a chart can show (float32, or integers when
+# nothing is left after the point), dates become epoch milliseconds on a
+# date axis, and evenly spaced x values become x0/dx. plotly>=6 serializes
+# such NumPy arrays as base64 typed arrays instead of JSON number lists,
+# which is what makes them small. Dates in hover text are written at the
+# resolution they have.
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import downsample
+from lazy_imports import lazy
+
+go = lazy("plotly.graph_objects")
+
+# Scatter points in a figure above which every scatter trace uses WebGL
+WEBGL_POINTS = 5_000
+DECIMALS = 2
+# Pixel columns a line trace is thinned to, two points (min, max) each
+LINE_BUCKETS = downsample.PLOTLY_WIDTH_PX
+
+# Integer types typed arrays support, smallest first
+_INT_TYPES = tuple(np.iinfo(t) for t in (np.int8, np.uint8, np.int16, np.uint16, np.int32))
+# Line shapes Scattergl can draw
+_GL_SHAPES = ('linear', 'hv', 'vh', 'hvh', 'vhv')
+_SCATTER = ('scatter', 'scattergl')
+# Per-point text arrays kept aligned with thinned points
+_TEXT = ('text', 'hovertext', 'customdata')
+
+
+def _is_dates(array):
+    if np.issubdtype(array.dtype, np.datetime64):
+        return True
+    return (array.dtype == object and len(array) > 0
+            and isinstance(array[0], (datetime.date, np.datetime64)))
+
+
+# A data array in the smallest type that draws the same chart; arrays of
+# text are returned as they are
+def compact_array(values, decimals=DECIMALS):
+    array = np.asarray(values)
+    if array.ndim != 1:
+        return values
+    if _is_dates(array):
+        return pd.to_datetime(array).values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+    if array.dtype.kind in 'biu':
+        if len(array) == 0:
+            return array.astype(np.int32)
+        lo, hi = array.min(), array.max()
+        for info in _INT_TYPES:
+            if info.min <= lo and hi <= info.max:
+                return array.astype(info.dtype)
+        return array.astype(np.float64)
+    if array.dtype.kind == 'f':
+        rounded = np.round(array, decimals)
+        if len(rounded) and np.isfinite(rounded).all() and (rounded == np.floor(rounded)).all():
+            return compact_array(rounded.astype(np.int64), decimals)
+        return rounded.astype(np.float32)
+    return values
+
+
+# Dates of a text array as strings at their resolution: days when every
+# one falls on midnight
+def _compact_text(values):
+    array = np.asarray(values)
+    if array.ndim != 1 or not _is_dates(array):
+        return values
+    dates = pd.to_datetime(array)
+    if (dates == dates.normalize()).all():
+        return np.asarray(dates.strftime('%Y-%m-%d'), dtype=object)
+    return values
+
+
+# (first, step) of an evenly spaced numeric array, or None
+def _step(array):
+    if array.dtype.kind not in 'iuf' or len(array) < 3:
+        return None
+    steps = np.diff(array)
+    if steps[0] == 0 or not (steps == steps[0]).all():
+        return None
+    return array[0], steps[0]
+
+
+def n_points(fig):
+    return sum(len(trace.x) for trace in fig.data
+               if trace.type in _SCATTER and trace.x is not None)
+
+
+def _to_webgl(trace):
+    props = trace.to_plotly_json()
+    props.pop('type', None)
+    line = props.get('line') or {}
+    if line.get('shape') not in (None, *_GL_SHAPES):
+        props['line'] = {**line, 'shape': 'linear'}
+    return go.Scattergl(props, skip_invalid=True)
+
+
+# A line-only trace with more points than `buckets` pixel columns keeps the
+# minimum and maximum of each column, if its x is sorted
+def _thin_line(trace, buckets):
+    if trace.type not in _SCATTER or trace.mode != 'lines' or trace.x is None or trace.y is None:
+        return
+    x, y = np.asarray(trace.x), np.asarray(trace.y)
+    if len(x) != len(y) or len(y) <= 2 * buckets or y.dtype.kind not in 'biuf':
+        return
+    order = compact_array(x) if _is_dates(x) else x
+    if order.dtype.kind not in 'biuf' or not np.isfinite(y).all() or (np.diff(order) < 0).any():
+        return
+    keep = downsample.minmax(y, buckets)
+    trace.x, trace.y = x[keep], y[keep]
+    for name in _TEXT:
+        values = getattr(trace, name, None)
+        if values is not None and np.ndim(values) and len(values) == len(x):
+            trace[name] = np.asarray(values)[keep]
+
+
+# The figure with WebGL traces above WEBGL_POINTS, line traces thinned to
+# line_buckets pixel columns and compact data arrays. Changes and returns
+# `fig`.
+def optimize(fig, webgl_points=WEBGL_POINTS, decimals=DECIMALS, line_buckets=LINE_BUCKETS):
+    if n_points(fig) > webgl_points:
+        # Figure.data only accepts its own traces, so the list is rebuilt
+        traces = [_to_webgl(trace) if trace.type == 'scatter' else trace for trace in fig.data]
+        fig.data = []
+        fig.add_traces(traces)
+
+    date_axes = set()
+    for trace in fig.data:
+        _thin_line(trace, line_buckets)
+        for name in ('x', 'y', 'z'):
+            values = getattr(trace, name, None)
+            if values is None:
+                continue
+            dates = name == 'x' and _is_dates(np.asarray(values))
+            if dates:
+                date_axes.add('xaxis' + (trace.xaxis or 'x')[1:])
+            compact = compact_array(values, decimals)
+            step = _step(compact) if name == 'x' and trace.type in _SCATTER else None
+            if step is None:
+                trace[name] = compact
+            else:
+                first, dx = step
+                trace.x = None
+                trace.x0 = pd.Timestamp(int(first), unit='ms').isoformat() if dates else first.item()
+                trace.dx = dx.item()
+        for name in _TEXT:
+            values = getattr(trace, name, None)
+            if values is not None and np.ndim(values):
+                trace[name] = _compact_text(values)
+        # Bar and histogram markers have no size
+        marker = getattr(trace, 'marker', None)
+        size = getattr(marker, 'size', None)
+        if size is not None and np.ndim(size):
+            marker.size = compact_array(size, decimals)
+
+    for axis in date_axes:
+        fig.layout[axis].type = 'date'
+    return fig
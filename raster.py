@@ -0,0 +1,147 @@
+# Server-side rasterized scatter plots. Above RASTER_POINTS points a
+# scatter is aggregated into a pixel grid per category with NumPy (point
+# counts and the mean of the size variable), shaded into one RGBA image and
+# sent as a single PNG layer. A coarser invisible heatmap on top carries
+# the hover tooltips with the aggregates of each cell.
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy
+
+go = lazy("plotly.graph_objects")
+PIL_Image = lazy("PIL.Image")
+
+# Points above which scatter charts are rasterized
+RASTER_POINTS = 20_000
+# Pixels of the image and cells of the hover grid (width, height)
+IMAGE_BINS = (640, 400)
+HOVER_BINS = (80, 50)
+# Plotly's default qualitative palette
+COLORS = ('#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A',
+          '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52')
+
+
+class Grid:
+    # counts: (categories, height, width) points per cell and category;
+    # size_sum: (height, width) sum of the size variable per cell
+    def __init__(self, x_edges, y_edges, labels, counts, size_sum):
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        self.labels = labels
+        self.counts = counts
+        self.size_sum = size_sum
+
+    @property
+    def total(self):
+        return self.counts.sum(axis=0)
+
+    @property
+    def size_mean(self):
+        total = self.total
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, self.size_sum / total, np.nan)
+
+    # Category with the most points in each cell (-1 when empty)
+    @property
+    def dominant(self):
+        return np.where(self.total > 0, self.counts.argmax(axis=0), -1)
+
+
+def _range(values):
+    lo, hi = float(np.nanmin(values)), float(np.nanmax(values))
+    return (lo, hi) if hi > lo else (lo - 0.5, hi + 0.5)
+
+
+# Points of each category counted into a bins[0] x bins[1] grid
+def aggregate(x, y, categories, size=None, bins=IMAGE_BINS, x_range=None, y_range=None):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    codes, labels = pd.factorize(categories, sort=True)
+    width, height = bins
+    x_lo, x_hi = x_range or _range(x)
+    y_lo, y_hi = y_range or _range(y)
+
+    ix = np.floor((x - x_lo) / (x_hi - x_lo) * width)
+    iy = np.floor((y - y_lo) / (y_hi - y_lo) * height)
+    # The maximum falls on the last edge; keep it in the last cell
+    ix = np.where(x == x_hi, width - 1, ix)
+    iy = np.where(y == y_hi, height - 1, iy)
+    valid = (codes >= 0) & (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+    cell = iy[valid].astype(np.int64) * width + ix[valid].astype(np.int64)
+
+    counts = np.bincount(codes[valid] * (width * height) + cell, minlength=len(labels) * width * height)
+    size_sum = np.zeros(width * height)
+    if size is not None:
+        weights = np.asarray(size, dtype=np.float64)[valid]
+        size_sum = np.bincount(cell, weights=np.nan_to_num(weights), minlength=width * height)
+    return Grid(np.linspace(x_lo, x_hi, width + 1), np.linspace(y_lo, y_hi, height + 1), labels,
+                counts.reshape(len(labels), height, width), size_sum.reshape(height, width))
+
+
+def _rgb(color):
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+
+
+# RGBA image of a grid, first row at the top: each pixel mixes the category
+# colors by their share of its points, opacity grows with log(points)
+def shade(grid, colors=COLORS):
+    palette = np.array([_rgb(colors[i % len(colors)]) for i in range(len(grid.labels))])
+    total = grid.total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rgb = np.einsum('chw,ck->hwk', grid.counts, palette) / total[..., None]
+    top = np.log1p(total.max()) or 1.0
+    alpha = np.where(total > 0, 0.25 + 0.75 * np.log1p(total) / top, 0)
+    image = np.dstack([np.nan_to_num(rgb), alpha * 255])
+    return np.flipud(image).round().astype(np.uint8)
+
+
+def png(rgba):
+    buffer = io.BytesIO()
+    PIL_Image.fromarray(rgba).save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+# Plotly figure of a large scatter: the shaded image as a layout image, an
+# invisible heatmap with aggregate tooltips, and one legend entry per
+# category. names: axis titles for 'x', 'y', 'size' and 'category'.
+def density_figure(x, y, categories, size=None, names=None, colors=COLORS,
+                   image_bins=IMAGE_BINS, hover_bins=HOVER_BINS):
+    names = {'x': 'x', 'y': 'y', 'size': 'size', 'category': 'category', **(names or {})}
+    x_range, y_range = _range(x), _range(y)
+    image = aggregate(x, y, categories, size, image_bins, x_range, y_range)
+    hover = aggregate(x, y, categories, size, hover_bins, x_range, y_range)
+
+    fig = go.Figure()
+    source = "data:image/png;base64," + base64.b64encode(png(shade(image, colors))).decode("ascii")
+    fig.add_layout_image(dict(
+        source=source, xref='x', yref='y', x=x_range[0], y=y_range[1],
+        sizex=x_range[1] - x_range[0], sizey=y_range[1] - y_range[0],
+        sizing='stretch', layer='below'
+    ))
+
+    total = hover.total.astype(np.float64)
+    labels = np.append(np.asarray(hover.labels, dtype=object), '')
+    customdata = np.dstack([hover.size_mean, labels[hover.dominant]]).astype(object)
+    fig.add_trace(go.Heatmap(
+        x=(hover.x_edges[:-1] + hover.x_edges[1:]) / 2,
+        y=(hover.y_edges[:-1] + hover.y_edges[1:]) / 2,
+        z=np.where(total > 0, total, np.nan),
+        customdata=customdata,
+        colorscale=[[0, 'rgba(0,0,0,0)'], [1, 'rgba(0,0,0,0)']],
+        showscale=False,
+        hovertemplate=(f"{names['x']}: %{{x:.0f}}<br>{names['y']}: %{{y:.0f}}<br>Puntos: %{{z}}"
+                       f"<br>{names['size']} (media): %{{customdata[0]:.0f}}"
+                       f"<br>{names['category']} principal: %{{customdata[1]}}<extra></extra>"),
+        name=''
+    ))
+    for i, label in enumerate(image.labels):
+        fig.add_trace(go.Scatter(x=[None], y=[None], mode='markers', name=str(label),
+                                 marker=dict(color=colors[i % len(colors)], size=10)))
+
+    fig.update_xaxes(range=list(x_range), title=names['x'])
+    fig.update_yaxes(range=list(y_range), title=names['y'])
+    fig.update_layout(legend_title=names['category'])
+    return fig
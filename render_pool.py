@@ -0,0 +1,140 @@
+# Off-thread chart rendering. Independent figures are drawn in a pool of
+# worker processes and come back as encoded bytes, so a page can lay out
+# its text and placeholders first and fill the charts in as they finish.
+# Results go through the same cache as figure_cache.render().
+#
+# draw must be a module-level function (see chart_panels.py). `data` holds
+# the arrays it plots and stays out of the cache key, since the data version
+# already identifies it; `params` holds the chart options and is keyed.
+import atexit
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import figure_cache
+import rendering
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# Worker count from HEALTH_GUIDE_RENDER_WORKERS (0 renders on the calling
+# thread instead); an empty or non-numeric value keeps the default
+def _workers():
+    try:
+        return int(os.environ.get("HEALTH_GUIDE_RENDER_WORKERS", "").strip())
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+WORKERS = _workers()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Workers are forked from a clean server process rather than from the
+# multi-threaded Streamlit server, with matplotlib already imported
+def _context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["matplotlib.figure", "chart_panels", "rendering"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _get_pool():
+    global _pool
+    if WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=_context())
+        return _pool
+
+
+# Shut the pool down (only if it is still `pool`, when given); the next
+# submit() starts a new one
+def shutdown(pool=None):
+    global _pool
+    with _pool_lock:
+        if _pool is not None and (pool is None or _pool is pool):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+# Runs in the worker process
+def _render(draw, data, params, fmt, dpi, style):
+    return rendering.render(functools.partial(draw, **data), params, fmt, dpi, style)
+
+
+def _done(result=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+# Future with the encoded bytes of draw(**data, **params) under `style`.
+# Cached charts come back already resolved.
+def submit(chart_id, version, draw, data=None, params=None, fmt='png',
+           dpi=figure_cache.DPI, style='default'):
+    if fmt not in figure_cache.FORMATS:
+        raise ValueError(f"fmt must be one of {figure_cache.FORMATS}, got {fmt!r}")
+    key = figure_cache.cache_key(chart_id, version, params, fmt, dpi, style)
+    cached = figure_cache.cache.get(key)
+    if cached is not None:
+        return _done(cached)
+
+    args = (draw, data or {}, params or {}, fmt, dpi, style)
+    pool = _get_pool()
+    try:
+        if pool is None:
+            raise BrokenProcessPool("render pool disabled")
+        pooled = pool.submit(_render, *args)
+    except BrokenProcessPool:
+        # The pool is broken (or there is none): draw here, more slowly
+        return _inline(pool, key, args)
+
+    future = Future()
+
+    # A worker that dies after the submit breaks the pool too; the chart
+    # is then drawn in this process instead of failing
+    def finish(done):
+        try:
+            result = done.result()
+        except BrokenProcessPool:
+            _copy(_inline(pool, key, args), future)
+        except BaseException as error:
+            future.set_exception(error)
+        else:
+            figure_cache.cache.put(key, result)
+            future.set_result(result)
+
+    pooled.add_done_callback(finish)
+    return future
+
+
+def _inline(pool, key, args):
+    if pool is not None:
+        shutdown(pool)
+    try:
+        result = _render(*args)
+    except Exception as error:
+        return _done(error=error)
+    figure_cache.cache.put(key, result)
+    return _done(result)
+
+
+def _copy(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
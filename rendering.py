@@ -0,0 +1,69 @@
+# Stateless chart rendering. Charts are built on plain
+# matplotlib.figure.Figure objects, which pyplot never tracks, so sessions
+# share no figures or current axes. The only shared state left is rcParams:
+# styles are applied with styled(), which holds a lock while the figure is
+# built under the style and restores the previous values afterwards.
+# Rasterizing and encoding, the slow part, reads the style from the
+# artists and runs in parallel outside the lock.
+import contextlib
+import io
+import sys
+import threading
+
+from lazy_imports import lazy
+
+mpl = lazy("matplotlib")
+mpl_style = lazy("matplotlib.style")
+sns = lazy("seaborn")
+
+DPI = 150
+
+# Reentrant so a chart can nest styles, e.g. one per subplot
+_style_lock = threading.RLock()
+
+
+# Build figures under a matplotlib style (a name, an rc dict or a list of
+# them) on top of matplotlib's defaults, whatever other code changed in the
+# global rcParams
+@contextlib.contextmanager
+def styled(style='default'):
+    with _style_lock, mpl_style.context('default'), mpl_style.context(style or 'default'):
+        yield
+
+
+# The rc dict sns.set_theme() would install globally, for use with styled()
+def seaborn_style(style='darkgrid', palette='deep', font_scale=1):
+    rc = {**sns.axes_style(style), **sns.plotting_context('notebook', font_scale=font_scale)}
+    rc['axes.prop_cycle'] = mpl.rcsetup.cycler(color=sns.color_palette(palette))
+    return rc
+
+
+# Close every pyplot figure opened inside the block, even when drawing
+# fails, so pyplot's figure manager does not grow with each rerun. Charts
+# built on Figure never open one; this guards library code (seaborn
+# figure-level functions) that still goes through pyplot.
+@contextlib.contextmanager
+def released_figures():
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    before = set(pyplot.get_fignums()) if pyplot else set()
+    try:
+        yield
+    finally:
+        pyplot = sys.modules.get("matplotlib.pyplot")
+        if pyplot:
+            for number in set(pyplot.get_fignums()) - before:
+                pyplot.close(number)
+
+
+def encode(fig, fmt='png', dpi=DPI):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+# Encoded bytes of the figure draw(**params) builds under `style`
+def render(draw, params=None, fmt='png', dpi=DPI, style='default'):
+    with released_figures():
+        with styled(style):
+            fig = draw(**(params or {}))
+        return encode(fig, fmt, dpi)
@@ -0,0 +1,55 @@
+# Page router: one declarative table drives the sidebar navigation, the
+# progress bar, deep links (?page=<slug>) and which render function runs.
+from collections import namedtuple
+
+import streamlit as st
+
+# slug: stable id used in the URL, label: text in the sidebar,
+# render: page function (None while a section is still being written),
+# needs_data: whether render() takes the sample DataFrame,
+# columns: the DataFrame columns the page uses (None for all of them)
+Page = namedtuple("Page", ["slug", "label", "render", "needs_data", "columns"], defaults=[None])
+
+NAV_KEY = "nav_page"
+
+
+def _sync_query_param():
+    st.query_params["page"] = st.session_state[NAV_KEY]
+
+
+# Sidebar radio bound to the ?page= query param; returns the selected Page
+def navigation(pages, label="Navegación"):
+    by_slug = {page.slug: page for page in pages}
+
+    # A deep link (or browser back/forward) wins over the remembered choice
+    requested = st.query_params.get("page")
+    if requested in by_slug:
+        st.session_state[NAV_KEY] = requested
+    elif st.session_state.get(NAV_KEY) not in by_slug:
+        st.session_state[NAV_KEY] = pages[0].slug
+
+    slug = st.radio(
+        label,
+        [page.slug for page in pages],
+        format_func=lambda s: by_slug[s].label,
+        key=NAV_KEY,
+        on_change=_sync_query_param
+    )
+    return by_slug[slug]
+
+
+# Fraction of the guide completed once the given page is reached
+def progress_of(pages, current):
+    return (pages.index(current) + 1) / len(pages)
+
+
+# Run only the selected page's render function; load_data(columns) returns
+# the sample DataFrame restricted to the columns the page declares
+def render(page, load_data):
+    if page.render is None:
+        st.title(page.label)
+        st.info("Esta sección estará disponible muy pronto.")
+    elif page.needs_data:
+        page.render(load_data(page.columns))
+    else:
+        page.render()
@@ -0,0 +1,231 @@
+# Synthetic health dataset generator. Fully vectorized and deterministic:
+# every chunk of rows draws from its own np.random.Generator stream, so
+# chunks can be generated in parallel and the output does not depend on
+# how many workers produced it.
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+AGE_GROUPS = ['0-18', '19-35', '36-50', '51-65', '65+']
+GENDERS = ['Male', 'Female']
+GENDER_P = [0.48, 0.52]
+BASE_REGIONS = ['North', 'South', 'East', 'West', 'Central']
+# Population of the base regions in millions (the info_regiones example)
+BASE_POPULATION_M = [2.1, 3.5, 2.7, 4.2, 3.8]
+
+MEASURES = ['cases', 'recovered', 'tests', 'hospitalized']
+COLUMNS = ['date', 'cases', 'recovered', 'tests', 'age_group', 'gender', 'region', 'hospitalized']
+
+GRANULARITIES = ('daily', 'patient')
+# Largest patient-level dataset, and the memory a row takes as generated
+# (about 15 bytes once compacted)
+MAX_PATIENT_ROWS = 50_000_000
+PATIENT_ROW_BYTES = 43
+# Patient-level datasets above this size get a memory warning in the app
+LARGE_PATIENT_ROWS = 10_000_000
+
+# Outbreaks start on day 50 and repeat every 100 days, lasting 14 days
+OUTBREAK_FIRST_DAY = 50
+OUTBREAK_EVERY = 100
+OUTBREAK_DAYS = 14
+
+# Rows generated per random stream / work unit
+CHUNK_ROWS = 1_000_000
+
+# Spawn keys of the independent streams derived from the seed
+_STRUCTURE_STREAM = 0
+_CHUNK_STREAM = 1
+_NEXT_DAY_STREAM = 2
+
+
+def region_names(n_regions):
+    extra = [f"Region {i + 1}" for i in range(len(BASE_REGIONS), n_regions)]
+    return (BASE_REGIONS + extra)[:n_regions]
+
+
+# Inhabitants per region; extra regions get a fixed pseudo-random size
+# between 1 and 5 million
+def region_population(n_regions):
+    extra = np.random.default_rng(len(BASE_REGIONS)).uniform(1.0, 5.0, max(0, n_regions - len(BASE_REGIONS)))
+    millions = np.round(np.r_[BASE_POPULATION_M, extra][:n_regions], 1)
+    return pd.Series((millions * 1_000_000).astype(np.int64),
+                     index=pd.Index(region_names(n_regions), name='region'), name='population')
+
+
+# Stable short id for a dataset spec, used as a cache key
+def dataset_key(**spec):
+    text = repr(sorted(spec.items()))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _rng(seed, *spawn_key):
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=spawn_key)))
+
+
+# Expected daily cases per region (days x regions): trend + two seasonal
+# peaks per year + outbreak bursts with a random size per region/outbreak.
+# The days start at day `first_day` of a dataset of `trend_days` days (by
+# default the days asked for); the trend rises from 20 to 40 over the
+# dataset and keeps its slope after it, so later days continue the series.
+def expected_cases(n_days, n_regions, seed, first_day=0, trend_days=None):
+    rng = _rng(seed, _STRUCTURE_STREAM)
+    trend_days = trend_days or n_days
+    last = first_day + n_days
+    t = np.arange(first_day, last)
+    seasonal = 10 * np.sin(4 * np.pi * t / 365)
+    slope = 20 / max(trend_days - 1, 1)
+    trend = np.where(t < trend_days, np.linspace(20, 40, trend_days)[np.minimum(t, trend_days - 1)],
+                     40 + slope * (t - trend_days + 1))
+    curve = np.repeat((trend + seasonal)[:, None], n_regions, axis=1)
+
+    starts = np.arange(OUTBREAK_FIRST_DAY, last, OUTBREAK_EVERY)
+    bumps = rng.integers(10, 30, size=(len(starts), n_regions))
+    offsets = np.zeros((last + 1, n_regions))
+    np.add.at(offsets, starts, bumps)
+    np.add.at(offsets, np.minimum(starts + OUTBREAK_DAYS, last), -bumps)
+    return curve + np.cumsum(offsets[:-1], axis=0)[first_day:]
+
+
+# Chunks draw from the stream _rng(*stream, chunk)
+def _fill_daily_chunk(out, lo, hi, stream, chunk, expected, n_regions):
+    rng = _rng(*stream, chunk)
+    n = hi - lo
+    cases = expected.ravel()[lo:hi] + rng.normal(0, 5, n)
+    cases = np.maximum(cases, 0)
+
+    out['cases'][lo:hi] = cases
+    out['recovered'][lo:hi] = cases * 0.8
+    out['tests'][lo:hi] = cases * rng.integers(5, 15, n)
+    out['hospitalized'][lo:hi] = cases * 0.12
+    out['day'][lo:hi] = np.arange(lo, hi) // n_regions
+    out['region'][lo:hi] = np.arange(lo, hi) % n_regions
+    out['age_group'][lo:hi] = rng.integers(0, len(AGE_GROUPS), n)
+    out['gender'][lo:hi] = rng.random(n) >= GENDER_P[0]
+
+
+def _fill_patient_chunk(out, lo, hi, stream, chunk, cells, n_regions):
+    rng = _rng(*stream, chunk)
+    n = hi - lo
+
+    out['cases'][lo:hi] = 1
+    out['recovered'][lo:hi] = rng.random(n) < 0.8
+    out['tests'][lo:hi] = rng.integers(5, 15, n)
+    out['hospitalized'][lo:hi] = rng.random(n) < 0.12
+    out['day'][lo:hi] = cells[lo:hi] // n_regions
+    out['region'][lo:hi] = cells[lo:hi] % n_regions
+    out['age_group'][lo:hi] = rng.integers(0, len(AGE_GROUPS), n)
+    out['gender'][lo:hi] = rng.random(n) >= GENDER_P[0]
+
+
+# (day, region) cell of every patient, already in date order: patients are
+# spread over cells with probability proportional to their expected cases
+def _patient_cells(expected, n_rows, rng):
+    p = expected.ravel() / expected.sum()
+    counts = rng.multinomial(n_rows, p)
+    return np.repeat(np.arange(len(p)), counts)
+
+
+# Build the dataset.
+#   granularity='daily'   -> one row per day and region (daily aggregates)
+#   granularity='patient' -> n_rows rows, one per confirmed patient
+def generate_health_data(start='2023-01-01', end='2023-12-31', n_regions=5,
+                         granularity='daily', n_rows=None, seed=42, workers=None):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}, got {granularity!r}")
+    if n_regions < 1:
+        raise ValueError("n_regions must be at least 1")
+
+    dates = pd.date_range(start=start, end=end, freq='D')
+    if len(dates) == 0:
+        raise ValueError(f"end ({end}) must not be before start ({start})")
+    if granularity == 'patient':
+        if not n_rows or n_rows < 1:
+            raise ValueError("n_rows is required for patient-level data")
+        if n_rows > MAX_PATIENT_ROWS:
+            raise ValueError(f"n_rows must be at most {MAX_PATIENT_ROWS:,}, got {n_rows:,}")
+    expected = expected_cases(len(dates), n_regions, seed)
+    return _generate(dates, expected, granularity, n_rows, (seed, _CHUNK_STREAM),
+                     _rng(seed, _STRUCTURE_STREAM, 1), workers)
+
+
+# Records of one day after the end of a generated dataset, given the spec
+# it was generated with: the day continues its trend, seasonality and
+# outbreaks at the same granularity, with as many patients per expected
+# case as the dataset had. Every day has its own random streams.
+def next_day(day, start='2023-01-01', end='2023-12-31', n_regions=5,
+             granularity='daily', n_rows=None, seed=42, workers=None):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}, got {granularity!r}")
+    dates = pd.date_range(start=start, end=end, freq='D')
+    day = pd.Timestamp(day).normalize()
+    if len(dates) == 0 or day <= dates[-1]:
+        raise ValueError(f"day must come after the dataset's end ({end}), got {day:%Y-%m-%d}")
+    first_day = (day - dates[0]).days
+    expected = expected_cases(1, n_regions, seed, first_day=first_day, trend_days=len(dates))
+    if granularity == 'patient':
+        if not n_rows or n_rows < 1:
+            raise ValueError("n_rows is required for patient-level data")
+        per_case = n_rows / expected_cases(len(dates), n_regions, seed).sum()
+        n_rows = max(int(round(expected.sum() * per_case)), 1)
+    stream = (seed, _NEXT_DAY_STREAM, first_day)
+    return _generate(pd.DatetimeIndex([day]), expected, granularity, n_rows, stream, _rng(*stream), workers)
+
+
+# Fill the rows of `dates` from the expected cases (days x regions);
+# chunks draw from `stream`, patients are placed with `cells_rng`
+def _generate(dates, expected, granularity, n_rows, stream, cells_rng, workers):
+    n_regions = expected.shape[1]
+    if granularity == 'daily':
+        total = len(dates) * n_regions
+        fill, context = _fill_daily_chunk, expected
+    else:
+        total = int(n_rows)
+        fill, context = _fill_patient_chunk, _patient_cells(expected, total, cells_rng)
+
+    out = {
+        'cases': np.empty(total, dtype=np.int64),
+        'recovered': np.empty(total, dtype=np.int64),
+        'tests': np.empty(total, dtype=np.int64),
+        'hospitalized': np.empty(total, dtype=np.int64),
+        'day': np.empty(total, dtype=np.int64),
+        'region': np.empty(total, dtype=np.int32),
+        'age_group': np.empty(total, dtype=np.int8),
+        'gender': np.empty(total, dtype=np.int8),
+    }
+    bounds = [(lo, min(lo + CHUNK_ROWS, total)) for lo in range(0, total, CHUNK_ROWS)]
+    workers = workers or min(len(bounds), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        jobs = [pool.submit(fill, out, lo, hi, stream, chunk, context, n_regions)
+                for chunk, (lo, hi) in enumerate(bounds)]
+        for job in jobs:
+            job.result()
+
+    data = {
+        'date': dates.values[out['day']],
+        'cases': out['cases'],
+        'recovered': out['recovered'],
+        'tests': out['tests'],
+        'age_group': pd.Categorical.from_codes(out['age_group'], AGE_GROUPS),
+        'gender': pd.Categorical.from_codes(out['gender'], GENDERS),
+        'region': pd.Categorical.from_codes(out['region'], region_names(n_regions)),
+        'hospitalized': out['hospitalized'],
+    }
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+# Measures present in a frame that may hold only some of the columns
+def _measures(df):
+    return [name for name in MEASURES if name in df.columns]
+
+
+# National totals per day, whatever the granularity
+def daily_totals(df):
+    return df.groupby('date', as_index=False)[_measures(df)].sum()
+
+
+# Totals per day and region (patient rows collapse into region-days)
+def daily_by_region(df):
+    return df.groupby(['date', 'region'], as_index=False, observed=True)[_measures(df)].sum()
@@ -0,0 +1,176 @@
+# SQLite data source. A dataset is copied once into its own database file
+# with indexes on date, region, age_group and gender; filters and
+# aggregations are then pushed down into SQL so only result rows reach
+# pandas. Readers borrow connections from a pool, one thread at a time.
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_DIR = os.path.join(BASE_DIR, ".cache", "sqlite")
+
+TABLE = "pacientes"
+DIMENSIONS = ('date', 'region', 'age_group', 'gender')
+MEASURES = ('cases', 'recovered', 'tests', 'hospitalized')
+AGGREGATES = ('SUM', 'AVG', 'MIN', 'MAX', 'COUNT')
+
+# Time grains usable in GROUP BY. Dates are stored as INTEGER days since
+# 1970-01-01, which keeps the date index small and range scans cheap.
+GRAINS = {
+    'date': "date",
+    'month': "CAST(julianday(date(date * 86400, 'unixepoch', 'start of month')) - 2440587.5 AS INTEGER)",
+}
+
+POOL_SIZE = 8
+INSERT_ROWS = 100_000
+
+_build_lock = threading.Lock()
+
+
+def path_for(key):
+    return os.path.join(DB_DIR, key + ".db")
+
+
+def _to_days(dates):
+    return pd.to_datetime(dates).values.astype('datetime64[D]').astype(np.int64)
+
+
+def _from_days(days):
+    return pd.to_datetime(np.asarray(days, dtype=np.int64), unit='D')
+
+
+# Write the frames into a new database file, index it and publish it
+# atomically; concurrent builders of the same key wait for the first one.
+# A failed build leaves no file behind.
+def ensure_database(key, frames):
+    path = path_for(key)
+    if os.path.exists(path):
+        return path
+    with _build_lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(DB_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            conn = sqlite3.connect(tmp_path)
+            try:
+                conn.execute("PRAGMA journal_mode=OFF")
+                conn.execute("PRAGMA synchronous=OFF")
+                if_exists = 'replace'
+                for frame in frames():
+                    frame = frame.copy()
+                    if 'date' in frame:
+                        frame['date'] = _to_days(frame['date'])
+                    frame.to_sql(TABLE, conn, if_exists=if_exists, index=False, chunksize=INSERT_ROWS)
+                    if_exists = 'append'
+                for column in DIMENSIONS:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_{column} ON {TABLE} ({column})")
+                conn.execute("ANALYZE")
+                conn.commit()
+            finally:
+                conn.close()
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return path
+
+
+def _connect(path):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only=1")
+    return conn
+
+
+# Read-only connections shared by Streamlit's session threads. A connection
+# is only ever used by the thread that borrowed it; at most `size` are open.
+class ConnectionPool:
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = _connect(self.path)
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# WHERE clause for filters such as
+#   {'region': ['North'], 'gender': ['Male'], 'date': (start, end)}
+def _where(filters):
+    clauses, params = [], []
+    for column in DIMENSIONS[1:]:
+        values = (filters or {}).get(column)
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(str(value) for value in values)
+    dates = (filters or {}).get('date')
+    if dates:
+        start, end = _to_days(list(dates))
+        clauses.append("date BETWEEN ? AND ?")
+        params.extend([int(start), int(end)])
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _query(pool, sql, params):
+    with pool.connection() as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    for grain in GRAINS:
+        if grain in df:
+            df[grain] = _from_days(df[grain])
+    return df
+
+
+# Aggregate measures grouped by dimensions and/or a time grain, e.g.
+#   aggregate(pool, by=['month', 'region'], filters={'gender': ['Male']})
+def aggregate(pool, by=(), measures=MEASURES, filters=None, func='SUM'):
+    func = func.upper()
+    if func not in AGGREGATES:
+        raise ValueError(f"func must be one of {AGGREGATES}, got {func!r}")
+    unknown = [name for name in [*by, *measures] if name not in (*DIMENSIONS, *GRAINS, *MEASURES)]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+
+    keys = [f"{GRAINS.get(name, name)} AS {name}" for name in by]
+    values = [f"{func}({name}) AS {name}" for name in measures]
+    where, params = _where(filters)
+    sql = f"SELECT {', '.join(keys + values)} FROM {TABLE}{where}"
+    if by:
+        sql += f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}"
+    return _query(pool, sql, params)
+
+
+# Matching rows, only the requested columns, at most `limit` of them
+def rows(pool, columns=DIMENSIONS + MEASURES, filters=None, limit=1000):
+    unknown = [name for name in columns if name not in (*DIMENSIONS, *MEASURES)]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+    where, params = _where(filters)
+    sql = f"SELECT {', '.join(columns)} FROM {TABLE}{where} ORDER BY date LIMIT ?"
+    return _query(pool, sql, params + [int(limit)])
+
+
+def count(pool, filters=None):
+    where, params = _where(filters)
+    with pool.connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {TABLE}{where}", params).fetchone()[0]
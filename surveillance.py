@@ -0,0 +1,122 @@
+# Outbreak detection on daily counts, one new day at a time for many series
+# at once. Every method keeps a small fixed state per series (the last
+# BASELINE_DAYS + LAG counts and a few accumulators), so a day costs the
+# same whatever the history length, and the work is vectorized over all
+# series.
+#
+#   EARS C1  today against the previous 7 days
+#   EARS C2  same with a 2-day gap before the 7-day baseline
+#   EARS C3  sum of the C2 excesses over the last 3 days
+#   CUSUM    one-sided cumulative sum of standardized excesses (C2 baseline)
+#   EWMA     exponentially weighted mean against control limits (C2 baseline)
+#
+# The counts trend and are overdispersed, so the baseline is a line fitted
+# over the 7 days and extrapolated to today, and its spread is the
+# prediction error of that line, never below the Poisson spread of the
+# predicted count. A flat mean/std baseline alerts on every series whose
+# counts merely grow.
+import numpy as np
+
+METHODS = ('c1', 'c2', 'c3', 'cusum', 'ewma')
+LABELS = {
+    'c1': 'EARS C1', 'c2': 'EARS C2', 'c3': 'EARS C3', 'cusum': 'CUSUM', 'ewma': 'EWMA',
+}
+
+BASELINE_DAYS = 7
+LAG = 2
+# Floor of the baseline standard deviation, so quiet series do not alert
+# on a single case
+MIN_STD = 0.5
+
+
+class Detector:
+    def __init__(self, n_series, threshold=3.0, c3_threshold=3.0,
+                 cusum_k=0.5, cusum_h=4.0, ewma_lambda=0.3, ewma_l=4.0):
+        self.n_series = n_series
+        self.threshold = threshold
+        self.c3_threshold = c3_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.ewma_lambda = ewma_lambda
+        self.ewma_l = ewma_l
+
+        self.days = 0
+        # Ring buffer of the last BASELINE_DAYS + LAG days, oldest first
+        # from position `days % size`
+        self._history = np.zeros((BASELINE_DAYS + LAG, n_series))
+        # C2 excesses of the two previous days, for C3
+        self._c2_excess = np.zeros((2, n_series))
+        self._cusum = np.zeros(n_series)
+        self._ewma = np.full(n_series, np.nan)
+
+    def copy(self):
+        other = Detector.__new__(Detector)
+        other.__dict__.update(self.__dict__)
+        for name in ('_history', '_c2_excess', '_cusum', '_ewma'):
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
+    # Expected count today and its floored std, from a line fitted over the
+    # `BASELINE_DAYS` days ending `lag` days ago
+    def _baseline(self, lag):
+        size = len(self._history)
+        ages = np.arange(lag + 1, lag + BASELINE_DAYS + 1)
+        window = self._history[(self.days - ages) % size]
+        x = ages - ages.mean()
+        sxx = (x ** 2).sum()
+        mean = window.mean(axis=0)
+        # Slope per day of age, so counts rising towards today have slope < 0
+        slope = (x[:, None] * (window - mean)).sum(axis=0) / sxx
+        expected = np.maximum(mean - slope * ages.mean(), 0)
+        residual = window - mean - slope * x[:, None]
+        variance = np.maximum((residual ** 2).sum(axis=0) / (BASELINE_DAYS - 2), expected)
+        std = np.sqrt(variance * (1 + 1 / BASELINE_DAYS + ages.mean() ** 2 / sxx))
+        return expected, np.maximum(std, MIN_STD)
+
+    # Add one day of counts (one per series); returns {method: alert array}
+    def update(self, counts):
+        counts = np.asarray(counts, dtype=np.float64)
+        ready = self.days >= BASELINE_DAYS + LAG
+        alerts = {}
+        if self.days >= BASELINE_DAYS:
+            mean1, std1 = self._baseline(0)
+            c1 = (counts - mean1) / std1
+        else:
+            c1 = np.zeros(self.n_series)
+        if ready:
+            mean2, std2 = self._baseline(LAG)
+            z = (counts - mean2) / std2
+            excess = np.maximum(0, z - 1)
+            c3 = excess + self._c2_excess.sum(axis=0)
+
+            self._cusum = np.maximum(0, self._cusum + z - self.cusum_k)
+            alerts['cusum'] = self._cusum > self.cusum_h
+            self._cusum[alerts['cusum']] = 0
+
+            lam = self.ewma_lambda
+            previous = np.where(np.isnan(self._ewma), mean2, self._ewma)
+            self._ewma = lam * counts + (1 - lam) * previous
+            limit = mean2 + self.ewma_l * std2 * np.sqrt(lam / (2 - lam))
+            alerts['ewma'] = self._ewma > limit
+        else:
+            z = excess = c3 = np.zeros(self.n_series)
+            alerts['cusum'] = alerts['ewma'] = np.zeros(self.n_series, dtype=bool)
+
+        alerts['c1'] = c1 > self.threshold
+        alerts['c2'] = ready & (z > self.threshold)
+        alerts['c3'] = ready & (c3 > self.c3_threshold)
+
+        self._c2_excess = np.vstack([self._c2_excess[1:], excess])
+        self._history[self.days % len(self._history)] = counts
+        self.days += 1
+        return alerts
+
+    # Feed a block of days, shape (days, series); returns {method: alert
+    # array of the same shape}
+    def run(self, counts):
+        counts = np.asarray(counts, dtype=np.float64)
+        alerts = {method: np.zeros(counts.shape, dtype=bool) for method in METHODS}
+        for day, row in enumerate(counts):
+            for method, flags in self.update(row).items():
+                alerts[method][day] = flags
+        return alerts